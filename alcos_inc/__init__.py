@@ -5,4 +5,5 @@
 # example import below, you can define it in another file and import
 # it into this module with the name 'Player':
 
-from alcos_inc.player import Player
+from alcos_inc.player import Player, IncrementalPlayer, AlphaBetaPlayer, \
+    MCTSPlayer, ParallelMCTSPlayer
@@ -1,38 +1,28 @@
-from queue import PriorityQueue
+from heapq import heappush, heappop
 from unittest.mock import _patch_dict
-from numpy import array, block, minimum, roll
-
-# colourDict for our int representation of colours
-colourDict = {'red': 1, "blue":-1, "open":0}
-
-# Neighbour hex steps in clockwise order
-_HEX_STEPS = array([(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)], 
-    dtype="i,i")
-
-# Utility function to add two coord tuples
-_ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
+from numpy import block, frombuffer, int8, minimum, newaxis, repeat
+from alcos_inc.flatboard import colourDict, toFlat, cellId, cellCosts, applyCaptures
+from alcos_inc.kernel import zeroOneBFS
+from alcos_inc.geometry import MAX_N, coordTable, neighbourTable, captureTable, edgeCells, distanceTable
+from alcos_inc.wavefront import MIN_BATCH, batchConnectionCost
 
 # Map between player token types
 _SWAP_PLAYER = { 0: 0, 1: -1, -1: 1 }
 
-_CAPTURE_PATTERNS = [[_ADD(n1, n2), n1, n2] 
-    for n1, n2 in 
-        list(zip(_HEX_STEPS, roll(_HEX_STEPS, 1))) + 
-        list(zip(_HEX_STEPS, roll(_HEX_STEPS, 2)))]
-
 'Heuristic function which calculates node distance to goal based on row and column distance'
+# Hex distances do not depend on the board size, so the table of the largest board serves every size
 def distance(location,goal):
-    locationCube = offsetToCube(location)
-    goalCube = offsetToCube(goal)
-    return (abs(locationCube[0] -goalCube[0]) + abs(locationCube[1] - goalCube[1]) + abs (locationCube[2] - goalCube[2]))/2
+    return distanceTable(MAX_N)[location[0]*MAX_N + location[1]][goal[0]*MAX_N + goal[1]]
 
-'Generates children based on an offset list and board location/proximity'
+'Generates children based on the neighbour table and board location/proximity'
 def generateChildren(board, location, n, colour):
+    coords = coordTable(n)
+    enemy = -colourDict[colour]
     children = []
-    offsets = [(0,-1),(1,-1),(-1,0),(1,0),(-1,1),(0,1)]
-    for x,y in offsets:
-        if ((location[0] + x in range(0,n) and location[1] + y in range(0,n)) and (board[location[0] + x][location[1] + y] != -colourDict[colour])):
-            children.append((location[0] + x, location[1] + y))
+    for nextNode in neighbourTable(n)[location[0]*n + location[1]]:
+        r, q = coords[nextNode]
+        if board[r][q] != enemy:
+            children.append((r, q))
     return children
 
 'Change co-ordinates from cube to offset'
@@ -65,69 +55,158 @@ def offsetToCube(node):
 # Note that some of the specific structure of the algorithm was adapted from the A* algorithm implemented at the following website:
 # https://www.redblobgames.com/pathfinding/a-star/implementation.html#python-astar
 
+# The priority queue is a plain heapq list: queue.PriorityQueue takes a lock on every put and get.
+# kernel.lineSearch takes the same arguments and always finds a cheapest path (the heuristic here
+# overestimates across our own cells, which cost nothing); on benchmarks.hotpaths it is about as fast,
+# quicker on full boards and slower on open large ones. The search itself runs on a flat board
+# (lineHeuristicAlgoFlat); the dicts are keyed by (r, q)
 def lineHeuristicAlgo(board, start, goal, n, colour):
-    pq = PriorityQueue()
-    pq.put((0,tuple(start)))
-    previousDict = {}
-    currCost = {}
-    previousDict[tuple(start)] = None
-
-    if board[start[0]][start[1]] == colourDict[colour]:
-        currCost[tuple(start)] = 0
-    else:
-        currCost[tuple(start)] = 1
+    previous, cost = lineHeuristicAlgoFlat(toFlat(board), cellId(start, n), cellId(goal, n), n, colourDict[colour])
+    coords = coordTable(n)
+    previousDict = {coords[node]: None if before is None else coords[before] for node, before in previous.items()}
+    currCost = {coords[node]: nodeCost for node, nodeCost in cost.items()}
+    return previousDict, currCost
 
-    while not pq.empty():
-        currNode = pq.get()[1]
+# lineHeuristicAlgo on a flat board (flatboard.py) for the player (1 or -1), between cell ids, with
+# the dicts keyed by cell id. Cell ids order like (r, q) tuples, so the heap breaks ties the same way
+def lineHeuristicAlgoFlat(tiles, start, goal, n, player):
+    pq = [(0, start)]
+    previousDict = {start: None}
+    currCost = {start: 0 if tiles[start] == player else 1}
+    # Heuristic distance of every cell to the goal
+    toGoal = distanceTable(n)[goal]
+    neighbours = neighbourTable(n)
+    enemy = -player
+
+    while pq:
+        currNode = heappop(pq)[1]
 
         if currNode == goal:
             break
-        
-        for nextNode in generateChildren(board, currNode, n, colour):
-            if board[currNode[0]][currNode[1]] == colourDict[colour]:
-                nextCost = currCost[currNode]
-            else:
-                nextCost = currCost[currNode] + 1
+
+        if tiles[currNode] == player:
+            nextCost = currCost[currNode]
+        else:
+            nextCost = currCost[currNode] + 1
+        for nextNode in neighbours[currNode]:
+            if tiles[nextNode] == enemy:
+                continue
             if nextNode not in currCost or nextCost < currCost[nextNode]:
                 currCost[nextNode] = nextCost
-                pq.put((distance(nextNode, goal) + currCost[nextNode], nextNode))
+                heappush(pq, (toGoal[nextNode] + nextCost, nextNode))
                 previousDict[nextNode] = currNode
     return previousDict, currCost
 
-'Driver function that calls A* search on every valid start and end for the player to find the best direct path, and returns nodes along that path'
+# Single pass replacement for running A* on every (start, goal) pair.
+# Both home edges of the colour are treated as a virtual super-source and super-sink, so one 0-1 BFS
+# (kernel.zeroOneBFS) over the board finds the minimum number of stones needed to connect them. Entering
+# a cell of our colour costs 0, entering an empty cell costs 1 and opponent cells are never entered. Cells are
+# flat indices (r*n + q); returns the cost of every cell and the predecessor of every reached cell.
+# With fromGoal the search is seeded from the goal edge instead, giving the distance field to the goal
+def edgeToEdgeSearch(board, n, colour, fromGoal=False):
+    return edgeToEdgeSearchFlat([tile for row in board for tile in row], n, colour, fromGoal)
+
+# edgeToEdgeSearch on a flat board (or any sequence of the tiles in cell id order)
+def edgeToEdgeSearchFlat(tiles, n, colour, fromGoal=False):
+    unreached = n*n + 1
+    cellCost = cellCosts(tiles, colourDict[colour], unreached)
+    sources = edgeCells(n)[colour][fromGoal]
+    return zeroOneBFS(neighbourTable(n), cellCost, sources, unreached)
+
+'Driver function that finds the cheapest edge-to-edge cost for the player, and returns the empty nodes along every optimal path'
 def optimalPathSearch(board, n, colour):
+    tiles = [tile for row in board for tile in row]
+    currCost, previous = edgeToEdgeSearchFlat(tiles, n, colour)
+    goals = edgeCells(n)[colour][1]
+    bestCost = min(currCost[goal] for goal in goals)
+    # No path between the edges at all
+    if bestCost > n*n:
+        return ([], n*n)
+
+    # Rebuild one path per goal node that reaches the edge at optimal cost
+    coords = coordTable(n)
+    pathList = set()
+    for goal in goals:
+        if currCost[goal] != bestCost:
+            continue
+        path = []
+        node = goal
+        while node != -1:
+            if tiles[node] == 0:
+                path.append(coords[node])
+            node = previous[node]
+        pathList.add(tuple(path))
+
+    return (list(pathList), bestCost)
+
+'Distance field of the colour from one of its home edges, with each cell counting its own cost'
+def distanceField(board, n, colour, fromGoal=False):
+    return edgeToEdgeSearch(board, n, colour, fromGoal)[0]
+
+# Every empty cell lying on at least one optimal edge-to-edge path, found from the two distance fields
+# rather than by rebuilding paths. Both fields count the cell itself, so an empty cell v is optimal when
+# fromStart[v] + (toGoal[v] - 1) == bestCost. Returns (optimal cells, bestCost) like pathAggregator
+def optimalCells(board, n, colour):
+    cells, bestCost = optimalCellsFlat([tile for row in board for tile in row], n, colour)
+    coords = coordTable(n)
+    return ([coords[node] for node in cells], bestCost)
+
+# optimalCells on a flat board, with the cells as cell ids (in increasing order)
+def optimalCellsFlat(tiles, n, colour):
+    fromStart = edgeToEdgeSearchFlat(tiles, n, colour)[0]
+    toGoal = edgeToEdgeSearchFlat(tiles, n, colour, fromGoal=True)[0]
+    goals = edgeCells(n)[colour][1]
+    bestCost = min(fromStart[goal] for goal in goals)
+    if bestCost > n*n:
+        return ([], n*n)
+
+    cells = [node for node in range(n*n)
+        if tiles[node] == 0 and fromStart[node] + toGoal[node] - 1 == bestCost]
+    return (cells, bestCost)
+
+'Minimum number of stones the colour still needs to connect its edges'
+def connectionCost(board, n, colour):
+    return connectionCostFlat([tile for row in board for tile in row], n, colour)
+
+# connectionCost on a flat board
+def connectionCostFlat(tiles, n, colour):
+    currCost = edgeToEdgeSearchFlat(tiles, n, colour)[0]
+    goals = edgeCells(n)[colour][1]
+    return min(min(currCost[goal] for goal in goals), n*n)
+
+# Original driver which calls A* search on every valid (start, goal) pair, i.e. n^2 searches per call.
+# No longer used by the agent, but kept so benchmarks/paths.py can measure it against edgeToEdgeSearch.
+# The searches run on a flat board, and only the paths kept are converted back to (r, q) cells
+def pairwisePathSearch(board, n, colour):
+    tiles = toFlat(board)
+    player = colourDict[colour]
+    coords = coordTable(n)
     bestCost = n*n
     bestPath = []
     pathList = {}
     for x in range(0,n):
         for y in range (0,n):
             if colour == 'red':
-                # Check if starting or ending node is of opponents colour
-                if -colourDict[colour] in [board[0][x], board[n-1][y]]:
-                    continue
-
-                # Run A*
-                previousDict, currCost = lineHeuristicAlgo(board,(0,x),(n-1,y),n, colour)
-
-                # If there is no valid path, lineHeuristicAlgo will return zero on whathever the goal is - must test for this
-                # Otherwise, rebuild the path from the dict that lineHeuristic algo makes
-                if (n-1,y) in currCost.keys():
-                    if currCost[(n-1,y)] <= bestCost:
-                        bestCost = currCost[(n-1,y)]
-                        bestPath = buildPath(previousDict, (n-1,y), board)
-                        # Store the path in pathlist
-                        pathList[bestPath] = bestCost
-            # Same as above, but with inverted co-ordinates
+                start, goal = x, (n-1)*n + y
+            # Same as red, but with inverted co-ordinates
             else:
-                if -colourDict[colour] in [board[x][0], board[y][n-1]]:
-                    continue
-                previousDict, currCost = lineHeuristicAlgo(board,(x,0),(y,n-1),n, colour)
+                start, goal = x*n, y*n + n-1
+
+            # Check if starting or ending node is of opponents colour
+            if -player in [tiles[start], tiles[goal]]:
+                continue
 
-                if (y,n-1) in currCost.keys():
-                    if currCost[(y,n-1)] <= bestCost:
-                        bestCost = currCost[(y,n-1)]
-                        bestPath = buildPath(previousDict, (y,n-1), board)
-                        pathList[bestPath] = bestCost
+            # Run A*
+            previousDict, currCost = lineHeuristicAlgoFlat(tiles, start, goal, n, player)
+
+            # If there is no valid path, lineHeuristicAlgo will return zero on whathever the goal is - must test for this
+            # Otherwise, rebuild the path from the dict that lineHeuristic algo makes
+            if goal in currCost:
+                if currCost[goal] <= bestCost:
+                    bestCost = currCost[goal]
+                    bestPath = tuple(coords[node] for node in buildPathFlat(previousDict, goal, tiles))
+                    # Store the path in pathlist
+                    pathList[bestPath] = bestCost
 
     bestPaths = []
     # If the path has optimal cost, add it to the pathlist
@@ -153,6 +232,16 @@ def buildPath(previousDict: dict, goal, board):
 
     return tuple(path)
 
+# buildPath for the cell id dicts of lineHeuristicAlgoFlat, on a flat board
+def buildPathFlat(previousDict, goal, tiles):
+    path = [goal] if tiles[goal] == 0 else []
+    currNode = previousDict[goal]
+    while currNode is not None:
+        if tiles[currNode] == 0:
+            path.append(currNode)
+        currNode = previousDict[currNode]
+    return tuple(path)
+
 # Aggregates all nodes from all paths in optimal path search into one list of nodes
 def pathAggregator(bestPaths):
     bestNodes = set()
@@ -170,35 +259,73 @@ def costTest(action, colour, board, n, currCost):
          cost = optimalPathSearch(board,n,'red')[1]
     return cost
 
-# Basic blocking strategy
-def blockStrat(board, n, colour):
-    # Use optimalPathSearch heuristic to find our set of playable tiles
-    bestNodes = pathAggregator(optimalPathSearch(board, n, colour))[0]
+# Basic blocking strategy: play the cell on one of our optimal paths that raises the opponent's
+# connection cost the most. A token on a cell that lies on none of the opponent's optimal paths cannot
+# raise their cost unless it captures some of their tokens, so the opponent's cost and optimal cells are
+# found once per move, only the candidates on those cells (or that capture) are searched again, and
+# every other candidate scores 0. When there are enough of them, the boards after those candidates are
+# scored together by wavefront.batchConnectionCost, in one batch. With paths (an incremental.PathCosts
+# kept up to date with board), costs come from its distance fields, and trial moves repair them rather
+# than searching again
+def blockStrat(board, n, colour, paths=None):
+    coords = coordTable(n)
+    return [coords[node] for node in blockStratFlat(toFlat(board), n, colour, paths)]
+
+# blockStrat on a flat board, returning cell ids. Trial moves write the tile and its captures
+# straight into tiles and write them back afterwards, so tiles is left as it was given
+def blockStratFlat(tiles, n, colour, paths=None):
+    player = colourDict[colour]
+    coords = coordTable(n)
+    # Every cell on one of our optimal paths is a playable tile
+    if paths is None:
+        bestNodes = optimalCellsFlat(tiles, n, colour)[0]
+    else:
+        bestNodes = [cellId(cell, n) for cell in paths.optimalCells(colour)[0]]
     moveWeights = dict((x,0) for x in bestNodes)
-    for futureMove in bestNodes:
-        # Find initial enemy cost
-        if colour == 'red':
-            enemyNodes, enemyCostOriginal = pathAggregator(optimalPathSearch(board, n, 'blue'))
-        else:
-            enemyNodes, enemyCostOriginal = pathAggregator(optimalPathSearch(board, n, 'red'))
-        
-        # Apply one move
-        board[futureMove[0]][futureMove[1]] = colourDict[colour]
-        nodeundo = _apply_captures(board, n, (futureMove[0],futureMove[1]))
 
-        # Find delta enemy cost
-        if colour == 'red':
-            enemyNodes, enemyCostNew = pathAggregator(optimalPathSearch(board, n, 'blue'))
-        else:
-            enemyNodes, enemyCostNew = pathAggregator(optimalPathSearch(board, n, 'red'))
-        
-        # Save and reset board
-        moveWeights[futureMove] = enemyCostNew - enemyCostOriginal
-        board[futureMove[0]][futureMove[1]] = 0
-        if nodeundo:
-            for node in nodeundo:
-                board[node[0]][node[1]] = -colourDict[colour]
+    # Find initial enemy cost, and the cells a block has to hit
+    enemy = 'blue' if colour == 'red' else 'red'
+    if paths is None:
+        enemyCells, enemyCostOriginal = optimalCellsFlat(tiles, n, enemy)
+    else:
+        enemyCells, enemyCostOriginal = paths.optimalCells(enemy)
+        enemyCells = [cellId(cell, n) for cell in enemyCells]
+    enemyCells = set(enemyCells)
+    batched = paths is None and len(enemyCells.intersection(bestNodes)) >= MIN_BATCH
+    trials = []
 
+    for futureMove in bestNodes:
+        # Apply one move
+        tiles[futureMove] = player
+        captured = applyCaptures(tiles, n, futureMove)
+
+        # Find delta enemy cost, if it can have changed
+        if captured or futureMove in enemyCells:
+            if batched:
+                trials.append((futureMove, captured))
+            elif paths is None:
+                enemyCostNew = connectionCostFlat(tiles, n, enemy)
+                moveWeights[futureMove] = enemyCostNew - enemyCostOriginal
+            else:
+                paths.push([(coords[futureMove], player)] + [(coords[cell], 0) for cell in captured])
+                moveWeights[futureMove] = paths.bestCost(enemy) - enemyCostOriginal
+                paths.pop()
+
+        # Reset board
+        tiles[futureMove] = 0
+        for cell in captured:
+            tiles[cell] = -player
+
+    # Score the batched candidates, each on its own copy of the board
+    if trials:
+        boards = repeat(frombuffer(tiles, dtype=int8)[newaxis], len(trials), axis=0)
+        for i, (futureMove, captured) in enumerate(trials):
+            boards[i][futureMove] = player
+            for cell in captured:
+                boards[i][cell] = 0
+        enemyCosts = batchConnectionCost(boards.reshape(len(trials), n, n), enemy)
+        for (futureMove, captured), enemyCostNew in zip(trials, enemyCosts):
+            moveWeights[futureMove] = int(enemyCostNew) - enemyCostOriginal
 
     maxDamage = max(moveWeights.values())
     bestMoves = []
@@ -217,18 +344,15 @@ def _apply_captures(board, n, coord):
     opp_type = board[coord[0]][coord[1]]
     mid_type = _SWAP_PLAYER[opp_type]
     captured = set()
-
-    # Check each capture pattern intersecting with coord
-    for pattern in _CAPTURE_PATTERNS:
-        coords = [_ADD(coord, s) for s in pattern]
-        # No point checking if any coord is outside the board!
-        if all(inside_bounds(x,n) for x in coords):
-            # tokens = [self._data[coord] for coord in coords]
-            tokens = [board[coord[0]][coord[1]] for coord in coords]
-            if tokens == [opp_type, mid_type, mid_type]:
-                # Capturing has to be deferred in case of overlaps
-                # Both mid cell tokens should be captured
-                captured.update(coords[1:])
+    coords = coordTable(n)
+
+    # Check each capture pattern intersecting with coord (the table only holds in-bounds patterns)
+    for opposite, mid1, mid2 in captureTable(n)[coord[0]*n + coord[1]]:
+        (r0, q0), (r1, q1), (r2, q2) = coords[opposite], coords[mid1], coords[mid2]
+        if board[r0][q0] == opp_type and board[r1][q1] == mid_type and board[r2][q2] == mid_type:
+            # Capturing has to be deferred in case of overlaps
+            # Both mid cell tokens should be captured
+            captured.update((coords[mid1], coords[mid2]))
 
     # Remove any captured tokens
     for coord in captured:
@@ -0,0 +1,187 @@
+"""
+Bitboard representation of the board for our agent, borrowed and modified
+from referee/bitboard.py (which is itself modelled on referee/board.py).
+
+Red and blue stones are each stored as a Python int bitmask. Cell (r, q) is
+bit r * (n + 2) + q; the two guard columns padding every row stay empty, so
+hex steps and capture offsets are plain shifts that never wrap a row.
+Colours use the agent's int representation (red = 1, blue = -1).
+"""
+
+# Neighbour hex steps in clockwise order
+_HEX_STEPS = [(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)]
+
+# Utility function to add two coord tuples
+_ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
+
+# Diamond capture patterns: [opposite offset, neighbour 1, neighbour 2]
+_CAPTURE_PATTERNS = [[_ADD(n1, n2), n1, n2]
+    for n1, n2 in
+        list(zip(_HEX_STEPS, _HEX_STEPS[-1:] + _HEX_STEPS[:-1])) +
+        list(zip(_HEX_STEPS, _HEX_STEPS[-2:] + _HEX_STEPS[:-2]))]
+
+# Number of guard columns padding each row
+_GUARD = 2
+
+
+class BitBoard:
+    def __init__(self, n):
+        self.n = n
+        self.width = n + _GUARD
+        # Bitmask per colour, indexed by colour int (red = 1, blue = -1)
+        self.stones = {1: 0, -1: 0}
+
+        row = (1 << n) - 1
+        self.mask = 0
+        column0 = columnN = 0
+        for r in range(n):
+            self.mask |= row << (r * self.width)
+            column0 |= 1 << (r * self.width)
+            columnN |= 1 << (r * self.width + n - 1)
+        # (start edge, goal edge) masks per colour
+        self.edges = {1: (row, row << ((n - 1) * self.width)), -1: (column0, columnN)}
+
+        self.steps = [dr * self.width + dq for dr, dq in _HEX_STEPS]
+        self.patterns = [[dr * self.width + dq for dr, dq in pattern]
+            for pattern in _CAPTURE_PATTERNS]
+
+    def index(self, coord):
+        return coord[0] * self.width + coord[1]
+
+    def coord(self, index):
+        return divmod(index, self.width)
+
+    def get(self, coord):
+        """
+        Colour int (1, -1 or 0 if open) at coord.
+        """
+        bit = 1 << self.index(coord)
+        if self.stones[1] & bit:
+            return 1
+        if self.stones[-1] & bit:
+            return -1
+        return 0
+
+    def set(self, coord, colour):
+        """
+        Set coord to the colour int (0 clears the cell).
+        """
+        bit = 1 << self.index(coord)
+        self.stones[1] &= ~bit
+        self.stones[-1] &= ~bit
+        if colour:
+            self.stones[colour] |= bit
+
+    def place(self, colour, coord):
+        """
+        Place a stone of the colour int at coord and apply diamond captures.
+        Returns the list of captured coordinates.
+        """
+        index = self.index(coord)
+        self.stones[colour] |= 1 << index
+        self.stones[-colour] &= ~(1 << index)
+        mine = self.stones[colour]
+        theirs = self.stones[-colour]
+        captured = 0
+
+        # Guard columns and rows past the end are always empty, so only the
+        # low end of the board needs an explicit bounds check
+        for opposite, mid1, mid2 in self.patterns:
+            if index + min(opposite, mid1, mid2) < 0:
+                continue
+            if (mine >> (index + opposite)) & 1 and \
+                    (theirs >> (index + mid1)) & 1 and \
+                    (theirs >> (index + mid2)) & 1:
+                captured |= (1 << (index + mid1)) | (1 << (index + mid2))
+
+        self.stones[-colour] &= ~captured
+        return [self.coord(i) for i in bitIndices(captured)]
+
+    def swap(self):
+        """
+        Apply the STEAL transform: mirror along the major axis and swap colours.
+        """
+        stones = {1: 0, -1: 0}
+        for colour in (1, -1):
+            for index in bitIndices(self.stones[colour]):
+                r, q = divmod(index, self.width)
+                stones[-colour] |= 1 << (q * self.width + r)
+        self.stones = stones
+
+    def expand(self, region):
+        """
+        Mask of all in-bounds cells adjacent to any cell in region.
+        """
+        grown = 0
+        for step in self.steps:
+            grown |= region << step if step > 0 else region >> -step
+        return grown & self.mask
+
+    def group(self, coord):
+        """
+        Mask of the connected group of stones containing coord.
+        """
+        region = 1 << self.index(coord)
+        colour = self.get(coord)
+        if not colour:
+            return region
+        stones = self.stones[colour]
+        while True:
+            grown = region | (self.expand(region) & stones)
+            if grown == region:
+                return region
+            region = grown
+
+    def connected(self, coord):
+        """
+        Coordinates of the connected group of stones containing coord.
+        """
+        return [self.coord(i) for i in bitIndices(self.group(coord))]
+
+    def hasWon(self, colour):
+        """
+        True iff the colour has a group of stones touching both home edges.
+        """
+        start, goal = self.edges[colour]
+        stones = self.stones[colour]
+        region = start & stones
+        while True:
+            grown = region | (self.expand(region) & stones)
+            if grown & goal:
+                return True
+            if grown == region:
+                return False
+            region = grown
+
+    def toMatrix(self):
+        """
+        Board as the agent's list of lists representation.
+        """
+        board = [[0 for _ in range(self.n)] for _ in range(self.n)]
+        for colour in (1, -1):
+            for index in bitIndices(self.stones[colour]):
+                r, q = divmod(index, self.width)
+                board[r][q] = colour
+        return board
+
+    @classmethod
+    def fromMatrix(cls, board):
+        """
+        Build a bitboard from the agent's list of lists representation.
+        """
+        bits = cls(len(board))
+        for r, row in enumerate(board):
+            for q, tile in enumerate(row):
+                if tile:
+                    bits.stones[tile] |= 1 << (r * bits.width + q)
+        return bits
+
+
+def bitIndices(mask):
+    """
+    Yield the index of every set bit in mask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
@@ -0,0 +1,73 @@
+"""
+Flat board representation for the agent's searches.
+
+A flat board is one array('b') of n * n tiles (1 red, -1 blue, 0 open),
+where cell (r, q) is the integer cell id r * n + q, as in geometry and
+kernel. Searches that run on it pass plain ints around and index a single
+array, instead of making a fresh (r, q) tuple per neighbour and going
+through two list lookups per tile. The player keeps one next to its list of
+lists board and converts only at the edges of a move (see Player.tiles):
+toFlat and toMatrix convert whole boards, cellId and geometry.coordTable
+single cells.
+
+The flat board's buffer is also what numpy.frombuffer needs to view it as
+an n x n int8 array without a copy (see wavefront.py).
+"""
+
+from array import array
+
+from alcos_inc.geometry import captureTable
+
+# colourDict for our int representation of colours
+colourDict = {'red': 1, "blue":-1, "open":0}
+
+
+def toFlat(board):
+    """
+    Flat copy of a list of lists board.
+    """
+    return array('b', [tile for row in board for tile in row])
+
+
+def toMatrix(tiles, n):
+    """
+    List of lists copy of a flat board.
+    """
+    return [tiles[r*n:(r+1)*n].tolist() for r in range(n)]
+
+
+def cellId(coord, n):
+    """
+    Cell id of the coord (r, q).
+    """
+    return coord[0]*n + coord[1]
+
+
+def cellCosts(tiles, player, unreached):
+    """
+    Cost of entering each cell for the player, as the kernel searches take
+    it: 0 for our tiles, unreached for the opponent's and 1 for any other
+    (open cells, or markers such as the goal 2 of main.py). Tiles can be
+    any sequence, e.g. a list of lists board's rows chained together.
+    """
+    # indexed by tile from -2 to 2, so that negative tiles wrap to the end
+    costs = [1, 0, 1, 1, unreached] if player == 1 else [1, unreached, 1, 1, 0]
+    return [costs[tile] for tile in tiles]
+
+
+def applyCaptures(tiles, n, node):
+    """
+    Check the (just placed) tile at node for diamond captures, and apply
+    them. Returns the list of captured cell ids.
+    """
+    player = tiles[node]
+    enemy = -player
+    captured = set()
+    for opposite, mid1, mid2 in captureTable(n)[node]:
+        if tiles[opposite] == player and tiles[mid1] == enemy and tiles[mid2] == enemy:
+            # Capturing has to be deferred in case of overlaps
+            captured.add(mid1)
+            captured.add(mid2)
+    for cell in captured:
+        tiles[cell] = 0
+    return list(captured)
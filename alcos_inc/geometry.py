@@ -0,0 +1,90 @@
+"""
+Board geometry tables for the agent, built once per board size and cached,
+so that searches, capture checks and heuristics look cells up instead of
+adding offsets and checking bounds in their inner loops.
+
+Cells are flat indices (r * n + q), as in kernel.py; coordTable maps them
+back to (r, q) tuples.
+"""
+
+from functools import lru_cache
+
+# Board sizes the referee allows
+MIN_N = 3
+MAX_N = 15
+
+# Neighbour hex steps, in the order the searches expand them
+_NEIGHBOUR_STEPS = [(0,-1),(1,-1),(-1,0),(1,0),(-1,1),(0,1)]
+
+# Neighbour hex steps in clockwise order (diamonds are pairs of them)
+_HEX_STEPS = [(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)]
+
+
+@lru_cache(maxsize=None)
+def coordTable(n):
+    """
+    The (r, q) coordinates of every flat cell.
+    """
+    return tuple(divmod(node, n) for node in range(n*n))
+
+
+@lru_cache(maxsize=None)
+def neighbourTable(n):
+    """
+    For every flat cell, the flat indices of its in-bounds neighbours.
+    """
+    table = []
+    for r in range(n):
+        for q in range(n):
+            table.append(tuple((r+x)*n + q+y for x,y in _NEIGHBOUR_STEPS if 0 <= r+x < n and 0 <= q+y < n))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def captureTable(n):
+    """
+    For every flat cell, the in-bounds diamond capture patterns through it as
+    (opposite cell, neighbour 1, neighbour 2) flat index triples.
+    """
+    patterns = []
+    for i, (r1, q1) in enumerate(_HEX_STEPS):
+        for roll in (1, 2):
+            r2, q2 = _HEX_STEPS[i - roll]
+            patterns.append(((r1 + r2, q1 + q2), (r1, q1), (r2, q2)))
+    table = []
+    for r in range(n):
+        for q in range(n):
+            cells = []
+            for pattern in patterns:
+                coords = [(r + dr, q + dq) for dr, dq in pattern]
+                if all(0 <= x < n and 0 <= y < n for x, y in coords):
+                    cells.append(tuple(x * n + y for x, y in coords))
+            table.append(tuple(cells))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def edgeCells(n):
+    """
+    The (start edge, goal edge) flat cells of each colour: red joins the
+    first and last rows, blue the first and last columns.
+    """
+    return {
+        'red': (tuple(range(n)), tuple(range(n*(n-1), n*n))),
+        'blue': (tuple(range(0, n*n, n)), tuple(range(n-1, n*n, n))),
+    }
+
+
+@lru_cache(maxsize=None)
+def distanceTable(n):
+    """
+    All-pairs hex distances: distanceTable(n)[a][b] is the number of steps
+    between flat cells a and b on an empty board (one bytes row per cell).
+    """
+    table = []
+    for r1 in range(n):
+        for q1 in range(n):
+            table.append(bytes(
+                (abs(r2 - r1) + abs(q2 - q1) + abs(r2 - r1 + q2 - q1)) // 2
+                for r2 in range(n) for q2 in range(n)))
+    return tuple(table)
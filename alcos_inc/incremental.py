@@ -0,0 +1,287 @@
+"""
+Incremental path costs: the distance fields behind algorithms.optimalCells
+and connectionCost, kept up to date across moves instead of being searched
+again from scratch.
+
+Each colour has two fields, from its start edge and from its goal edge, with
+the same values as algorithms.distanceField: the cost of the cheapest path
+from the edge to each cell, counting every cell on it (0 for our tokens, 1
+for empty cells, opponent tokens are never entered). When a few cells change
+(a placed token and its captures), only the part of each field that depends
+on them is repaired, LPA* style (without a heuristic, as whole fields are
+needed): each cell keeps its current value g and a one-step lookahead rhs
+(its own cost plus its cheapest neighbour's g, or just its own cost on the
+edge), and only cells where the two disagree are queued and settled, in
+order of min(g, rhs), until all agree again.
+
+The repair needs strictly positive costs (two of our own tokens next to
+each other would otherwise keep up each other's stale costs), so the fields
+store scaled costs: K per empty cell and 1 per token of ours, with K = n * n
++ 1 (more than the number of tokens on any path). The cheapest scaled path is a cheapest
+path (through the fewest of our tokens), and integer division by K recovers
+its cost. Only tokens are charged the extra 1, not every cell, so that a
+move does not change the scaled cost of every path it makes shorter or
+longer without making it cheaper.
+
+Trial moves (e.g. in blockStrat) can be taken back with push() and pop():
+between them every write is journaled and pop() restores the old values
+exactly. Fields are only repaired when queried, so a trial move that only
+asks for the opponent's cost never repairs our own fields, and a cost query
+stops repairing as soon as the cheapest goal cell is exact.
+
+Only IncrementalPlayer uses these fields: a token usually changes the cost
+of about a quarter of the cells of each field, and at these board sizes
+repairing that many cells one by one is slower than the 0-1 BFS searches of
+algorithms.py, so the default Player keeps searching from scratch.
+"""
+
+from heapq import heappush, heappop
+
+from alcos_inc.geometry import neighbourTable, edgeCells
+from alcos_inc.kernel import shortestPaths
+
+
+class _Field:
+    """
+    One colour's distance field from one of its edges, in scaled costs.
+    """
+
+    def __init__(self, tiles, n, player, sources):
+        self.tiles = tiles
+        self.n = n
+        self.player = player
+        # scaled costs of our cells and empty cells, and of unreached cells
+        self.scale = n*n + 1
+        self.own = 1
+        self.empty = self.scale
+        self.unreached = (n*n + 1) * self.scale
+        self.neighbours = neighbourTable(n)
+        self.source = bytearray(n*n)
+        for node in sources:
+            self.source[node] = 1
+        self.sources = sources
+        # cells whose cost changed since the last repair
+        self.pending = []
+        # undo log of (list, index, old value) writes, while a trial is open
+        self.journal = None
+        self.reset()
+
+    def reset(self):
+        """
+        Search the whole field again (e.g. after a steal).
+        """
+        self.g = shortestPaths(self.neighbours, self.cellCosts(), self.sources,
+            self.unreached)[0]
+        self.rhs = list(self.g)
+        self.pending = []
+
+    def cellCosts(self):
+        return [self.cost(node) for node in range(len(self.tiles))]
+
+    def cost(self, node):
+        tile = self.tiles[node]
+        if tile == self.player:
+            return self.own
+        return self.empty if tile == 0 else self.unreached
+
+    def costs(self):
+        """
+        The field in unscaled costs (unreached cells cost n * n + 1).
+        """
+        self.repair()
+        scale = self.scale
+        return [value // scale for value in self.g]
+
+    def repair(self, goals=None):
+        """
+        Bring every cell back to its exact cost after the pending changes.
+        With goals (cells), stop as soon as the cheapest of them is exact
+        instead, and return its scaled cost: every cell still queued goes
+        back to pending, for the next repair.
+        """
+        if not self.pending and goals is None:
+            return None
+        g, rhs, tiles, source = self.g, self.rhs, self.tiles, self.source
+        neighbours, journal = self.neighbours, self.journal
+        player, own, empty = self.player, self.own, self.empty
+        unreached = self.unreached
+        # queue entries are key * size + cell, which sort as (key, cell)
+        size = len(tiles)
+        heap = []
+
+        def update(node):
+            # recompute the cell's lookahead, and queue it if inconsistent
+            tile = tiles[node]
+            if tile == -player:
+                value = unreached
+            else:
+                value = own if tile == player else empty
+                if not source[node]:
+                    value = min(unreached, value
+                        + min([g[nextNode] for nextNode in neighbours[node]]))
+            if value != rhs[node]:
+                if journal is not None:
+                    journal.append((rhs, node, rhs[node]))
+                rhs[node] = value
+            if g[node] != value:
+                heappush(heap, min(g[node], value) * size + node)
+
+        for node in self.pending:
+            update(node)
+        self.pending = []
+
+        lastKey = -1
+        while heap:
+            if goals is not None and heap[0] // size > lastKey:
+                # an inconsistent cell is never below the smallest key, so
+                # once a consistent goal is, it is exact and the cheapest
+                lastKey = heap[0] // size
+                best = min(max(g[node], rhs[node]) for node in goals)
+                if best < lastKey:
+                    self.pending = [entry % size for entry in heap]
+                    return best
+            key, node = divmod(heappop(heap), size)
+            old = g[node]
+            value = rhs[node]
+            if old == value or key != min(old, value):
+                continue
+            if journal is not None:
+                journal.append((g, node, old))
+            if old > value:
+                # cheaper than before: settle it, and offer it to its
+                # neighbours (a cheaper neighbour can only lower their rhs)
+                g[node] = value
+                for nextNode in neighbours[node]:
+                    tile = tiles[nextNode]
+                    if tile == -player or source[nextNode]:
+                        continue
+                    step = value + (own if tile == player else empty)
+                    if step < rhs[nextNode]:
+                        if journal is not None:
+                            journal.append((rhs, nextNode, rhs[nextNode]))
+                        rhs[nextNode] = step
+                        if g[nextNode] != step:
+                            heappush(heap, min(g[nextNode], step) * size
+                                + nextNode)
+            else:
+                # dearer than before: forget it, and look again at it and at
+                # the neighbours whose rhs came through it
+                g[node] = unreached
+                update(node)
+                for nextNode in neighbours[node]:
+                    tile = tiles[nextNode]
+                    if rhs[nextNode] == old + (own if tile == player
+                            else empty) and not source[nextNode]:
+                        update(nextNode)
+        if goals is not None:
+            return min(g[node] for node in goals)
+        return None
+
+
+class PathCosts:
+    def __init__(self, board, n):
+        """
+        Path costs for both colours on the board (the agent's list of lists
+        representation, which is not kept in sync: pass every change to
+        set() or push()).
+        """
+        self.n = n
+        self.tiles = [tile for row in board for tile in row]
+        self.fields = {}
+        for colour, player in (('red', 1), ('blue', -1)):
+            start, goal = edgeCells(n)[colour]
+            self.fields[colour] = (
+                _Field(self.tiles, n, player, start),
+                _Field(self.tiles, n, player, goal),
+            )
+        # undo stack of (tile writes, field journals, field pending lists)
+        self.stack = []
+
+    def set(self, changes):
+        """
+        Apply changes, a list of ((r, q), tile) pairs (tile 1, -1 or 0).
+        """
+        for (r, q), tile in changes:
+            node = r*self.n + q
+            if self.tiles[node] == tile:
+                continue
+            if self.stack:
+                self.stack[-1][0].append((node, self.tiles[node]))
+            self.tiles[node] = tile
+            for field in self._allFields():
+                field.pending.append(node)
+
+    def reset(self, board):
+        """
+        Take every cell from the board again and search all fields from
+        scratch (for changes that move every token, i.e. a steal).
+        """
+        if self.stack:
+            raise RuntimeError("cannot reset PathCosts during a trial move")
+        self.tiles[:] = [tile for row in board for tile in row]
+        for field in self._allFields():
+            field.reset()
+
+    def push(self, changes):
+        """
+        Apply changes (as in set) as a trial that pop() takes back.
+        """
+        journals = []
+        pending = []
+        for field in self._allFields():
+            pending.append(list(field.pending))
+            field.journal = []
+            journals.append(field.journal)
+        self.stack.append(([], journals, pending))
+        self.set(changes)
+
+    def pop(self):
+        """
+        Take back the last push(), restoring every value exactly.
+        """
+        tiles, journals, pending = self.stack.pop()
+        for node, tile in reversed(tiles):
+            self.tiles[node] = tile
+        outer = self.stack[-1][1] if self.stack else None
+        for i, field in enumerate(self._allFields()):
+            for values, node, value in reversed(journals[i]):
+                values[node] = value
+            field.pending = pending[i]
+            field.journal = outer[i] if outer else None
+
+    def _allFields(self):
+        for start, goal in self.fields.values():
+            yield start
+            yield goal
+
+    def distanceField(self, colour, fromGoal=False):
+        """
+        The colour's distance field, as algorithms.distanceField.
+        """
+        return self.fields[colour][fromGoal].costs()
+
+    def bestCost(self, colour):
+        """
+        Minimum number of tokens the colour still needs to connect its
+        edges, as algorithms.connectionCost.
+        """
+        start, goal = self.fields[colour]
+        best = start.repair(goal.sources) // start.scale
+        return min(best, self.n*self.n)
+
+    def optimalCells(self, colour):
+        """
+        Every empty cell on at least one of the colour's optimal paths and
+        the optimal cost, as algorithms.optimalCells.
+        """
+        n = self.n
+        fromStart = self.distanceField(colour)
+        toGoal = self.distanceField(colour, fromGoal=True)
+        goals = self.fields[colour][1].sources
+        bestCost = min(fromStart[node] for node in goals)
+        if bestCost > n*n:
+            return ([], n*n)
+        tiles = self.tiles
+        cells = [divmod(node, n) for node in range(n*n) if tiles[node] == 0
+            and fromStart[node] + toGoal[node] - 1 == bestCost]
+        return (cells, bestCost)
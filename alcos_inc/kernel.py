@@ -0,0 +1,236 @@
+"""
+Shortest-path search kernel shared by the agent's path searches and
+evaluators.
+
+Every search here works on flat cell indices (r * n + q) with a neighbour
+table (see geometry.neighbourTable) and a list cellCost giving the cost of entering
+each cell, where cellCost[v] == unreached marks a cell that can never be
+entered. Sources are entered too, so the cost of a path is the sum of the
+costs of all its cells. Each search returns (cost, previous): the cost of
+the cheapest path found to every cell (unreached if none) and each reached
+cell's predecessor on it (-1 for sources and unreached cells). With a goal,
+the search stops as soon as the goal's cost is final.
+
+Three frontiers are provided, none of them synchronised (queue.PriorityQueue
+takes a lock on every put and get):
+* zeroOneBFS: a deque, for costs of 0 and 1 only (0 cost cells go in front)
+* dialSearch: a bucket queue (Dial's algorithm) for small integer costs
+* heapSearch: a binary heap (heapq), for any non-negative costs
+shortestPaths picks the right one for the costs it is given.
+"""
+
+from collections import deque
+from collections.abc import Mapping
+from heapq import heappush, heappop
+
+from alcos_inc.geometry import neighbourTable, coordTable
+from alcos_inc.flatboard import colourDict, cellCosts
+
+# Largest cell cost for which the bucket queue is used over the heap
+_MAX_BUCKET_COST = 16
+
+
+def zeroOneBFS(neighbours, cellCost, sources, unreached, goal=None):
+    """
+    0-1 BFS: every cell cost must be 0, 1 or unreached.
+    """
+    cost = [unreached] * len(cellCost)
+    previous = [-1] * len(cellCost)
+    done = bytearray(len(cellCost))
+    queue = deque()
+
+    # Seed the queue from the sources, keeping the deque sorted (cost 0 cells in front)
+    for node in sources:
+        step = cellCost[node]
+        if step == unreached or step >= cost[node]:
+            continue
+        cost[node] = step
+        if step:
+            queue.append(node)
+        else:
+            queue.appendleft(node)
+
+    while queue:
+        currNode = queue.popleft()
+        if done[currNode]:
+            continue
+        done[currNode] = 1
+        if currNode == goal:
+            break
+        base = cost[currNode]
+        for nextNode in neighbours[currNode]:
+            step = cellCost[nextNode]
+            if step == unreached:
+                continue
+            if base + step < cost[nextNode]:
+                cost[nextNode] = base + step
+                previous[nextNode] = currNode
+                if step:
+                    queue.append(nextNode)
+                else:
+                    queue.appendleft(nextNode)
+    return cost, previous
+
+
+def dialSearch(neighbours, cellCost, sources, unreached, goal=None, maxCost=None):
+    """
+    Dijkstra's algorithm with a bucket queue (Dial's algorithm), for non-
+    negative integer cell costs of at most maxCost (by default the largest
+    cost in cellCost). Only maxCost + 1 buckets are needed, used cyclically,
+    as every cell waiting in the queue costs between the current cost and
+    maxCost more than it.
+    """
+    if maxCost is None:
+        maxCost = max((c for c in cellCost if c != unreached), default=0)
+    size = maxCost + 1
+    buckets = [[] for _ in range(size)]
+    cost = [unreached] * len(cellCost)
+    previous = [-1] * len(cellCost)
+    done = bytearray(len(cellCost))
+    waiting = 0
+
+    for node in sources:
+        step = cellCost[node]
+        if step == unreached or step >= cost[node]:
+            continue
+        cost[node] = step
+        buckets[step % size].append(node)
+        waiting += 1
+
+    level = 0
+    while waiting:
+        bucket = buckets[level % size]
+        while bucket:
+            currNode = bucket.pop()
+            waiting -= 1
+            # Cells whose cost improved after being queued are met again later
+            if done[currNode]:
+                continue
+            done[currNode] = 1
+            if currNode == goal:
+                return cost, previous
+            for nextNode in neighbours[currNode]:
+                step = cellCost[nextNode]
+                if step == unreached:
+                    continue
+                if level + step < cost[nextNode]:
+                    cost[nextNode] = level + step
+                    previous[nextNode] = currNode
+                    buckets[(level + step) % size].append(nextNode)
+                    waiting += 1
+        level += 1
+    return cost, previous
+
+
+def heapSearch(neighbours, cellCost, sources, unreached, goal=None):
+    """
+    Dijkstra's algorithm with a binary heap, for any non-negative costs.
+    """
+    cost = [unreached] * len(cellCost)
+    previous = [-1] * len(cellCost)
+    done = bytearray(len(cellCost))
+    heap = []
+
+    for node in sources:
+        step = cellCost[node]
+        if step == unreached or step >= cost[node]:
+            continue
+        cost[node] = step
+        heappush(heap, (step, node))
+
+    while heap:
+        base, currNode = heappop(heap)
+        if done[currNode]:
+            continue
+        done[currNode] = 1
+        if currNode == goal:
+            break
+        for nextNode in neighbours[currNode]:
+            step = cellCost[nextNode]
+            if step == unreached:
+                continue
+            if base + step < cost[nextNode]:
+                cost[nextNode] = base + step
+                previous[nextNode] = currNode
+                heappush(heap, (base + step, nextNode))
+    return cost, previous
+
+
+def shortestPaths(neighbours, cellCost, sources, unreached, goal=None):
+    """
+    Run the cheapest kernel that handles the given cell costs.
+    """
+    maxCost = max((c for c in cellCost if c != unreached), default=0)
+    if maxCost <= 1:
+        return zeroOneBFS(neighbours, cellCost, sources, unreached, goal)
+    if maxCost <= _MAX_BUCKET_COST and \
+            all(type(c) is int for c in cellCost):
+        return dialSearch(neighbours, cellCost, sources, unreached, goal,
+            maxCost)
+    return heapSearch(neighbours, cellCost, sources, unreached, goal)
+
+
+class _CellMap(Mapping):
+    """
+    Read-only dict-like view of a search result list, keyed by (r, q) and
+    holding only the reached cells. Keys (and, for predecessors, values)
+    are converted from flat cells only when they are looked at, instead of
+    building a dict over the whole board for every search.
+    """
+
+    def __init__(self, values, cost, n, unreached, coords=False):
+        self.values = values
+        self.cost = cost
+        self.n = n
+        self.unreached = unreached
+        # values are predecessors, given back as (r, q) (None for -1)
+        self.coords = coords
+
+    def __getitem__(self, cell):
+        r, q = cell
+        if not (0 <= r < self.n and 0 <= q < self.n):
+            raise KeyError(cell)
+        node = r*self.n + q
+        if self.cost[node] == self.unreached:
+            raise KeyError(cell)
+        value = self.values[node]
+        if self.coords:
+            return coordTable(self.n)[value] if value != -1 else None
+        return value
+
+    def __iter__(self):
+        coords = coordTable(self.n)
+        unreached = self.unreached
+        return (coords[node] for node, nodeCost in enumerate(self.cost) if nodeCost != unreached)
+
+    def __len__(self):
+        return len(self.cost) - self.cost.count(self.unreached)
+
+
+# Cheapest path for the colour from start to goal, with the same arguments and results as
+# algorithms.lineHeuristicAlgo: (previousDict, currCost) maps keyed by (r, q) for every reached
+# cell. Opponent cells are never entered, our own cells cost 0 and any other cell costs 1, so a
+# path's cost is the number of tokens still needed to complete it. Unlike lineHeuristicAlgo, whose
+# distance heuristic overestimates across our own (free) cells, the path is always a cheapest one;
+# the 0-1 BFS stops at the goal, and the maps are read-only views converted on access (_CellMap)
+def lineSearch(board, start, goal, n, colour):
+    unreached = n*n + 1
+    cellCost = cellCosts([tile for row in board for tile in row], colourDict[colour], unreached)
+    cost, previous = zeroOneBFS(neighbourTable(n), cellCost,
+        [start[0]*n + start[1]], unreached, goal[0]*n + goal[1])
+    return (_CellMap(previous, cost, n, unreached, coords=True),
+        _CellMap(cost, cost, n, unreached))
+
+
+# Cells of the path to goal found by lineSearch (or lineHeuristicAlgo), from start to goal,
+# or an empty list if goal was not reached
+def tracePath(previousDict, goal):
+    goal = tuple(goal)
+    if goal not in previousDict:
+        return []
+    path = []
+    node = goal
+    while node is not None:
+        path.append(node)
+        node = previousDict[node]
+    return path[::-1]
@@ -8,7 +8,7 @@ This script contains the entry point to the program (the code in
 
 import sys
 import json
-from alcos_inc.algorithms import buildPath, lineHeuristicAlgo
+from alcos_inc.kernel import lineSearch, tracePath
 import alcos_inc.util as util
 
 def main():
@@ -58,6 +58,10 @@ def main():
         if board_dict[coords] == '2':
             board[coords[0]][coords[1]] = 2
 
-    # Call A* search
-    previousDict, CurrCost = lineHeuristicAlgo(board, start, goal, n)
-    buildPath(previousDict, CurrCost, goal, start)
\ No newline at end of file
+    # Find the cheapest path for red (blue cells are blocked), then print
+    # its length and every cell on it from start to goal
+    previousDict, currCost = lineSearch(board, start, goal, n, 'red')
+    path = tracePath(previousDict, goal)
+    print(len(path))
+    for r, q in path:
+        print(f"({r},{q})")
\ No newline at end of file
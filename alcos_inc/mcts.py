@@ -0,0 +1,256 @@
+"""
+Monte Carlo Tree Search for the agent, as an alternative to blockStrat.
+
+The tree is grown with UCT selection. Each new leaf is scored by a random
+playout on a flat copy of the board (cell (r, q) is index r * n + q), which
+applies diamond captures exactly like _apply_captures. At the end of the
+playout a union-find pass over the stones decides the winner. The tree for
+the move actually played is kept between turns, so work from earlier
+searches is reused.
+"""
+
+from math import log, sqrt
+from random import Random
+from time import process_time
+
+from alcos_inc.geometry import neighbourTable, captureTable
+
+# colourDict for our int representation of colours
+colourDict = {'red': 1, "blue":-1, "open":0}
+
+# UCT exploration constant
+EXPLORATION = 0.7
+
+# Stop growing the tree past this many nodes (memory is limited to 100MB)
+MAX_NODES = 200000
+
+# Playouts longer than this many moves times n^2 are scored as a draw
+_PLAYOUT_LIMIT = 3
+
+
+def playMove(board, n, cell, player):
+    """
+    Place a stone for player (1 or -1) at flat cell and apply captures.
+    Returns the list of captured cells.
+    """
+    board[cell] = player
+    captured = set()
+    for opposite, mid1, mid2 in captureTable(n)[cell]:
+        if board[mid1] == -player and board[mid2] == -player and board[opposite] == player:
+            captured.add(mid1)
+            captured.add(mid2)
+    for c in captured:
+        board[c] = 0
+    return list(captured)
+
+
+def winner(board, n):
+    """
+    Colour int (1 or -1) of the player whose stones join their two home
+    edges, or 0 if neither does. Uses union-find with virtual edge nodes.
+    """
+    neighbours = neighbourTable(n)
+    size = n * n
+    parent = list(range(size + 4))
+    # Virtual nodes: red top/bottom rows, blue left/right columns
+    redStart, redGoal, blueStart, blueGoal = size, size + 1, size + 2, size + 3
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for cell in range(size):
+        player = board[cell]
+        if not player:
+            continue
+        r, q = divmod(cell, n)
+        if player == 1:
+            if r == 0:
+                parent[find(cell)] = find(redStart)
+            if r == n - 1:
+                parent[find(cell)] = find(redGoal)
+        else:
+            if q == 0:
+                parent[find(cell)] = find(blueStart)
+            if q == n - 1:
+                parent[find(cell)] = find(blueGoal)
+        for other in neighbours[cell]:
+            if other < cell and board[other] == player:
+                parent[find(cell)] = find(other)
+
+    if find(redStart) == find(redGoal):
+        return 1
+    if find(blueStart) == find(blueGoal):
+        return -1
+    return 0
+
+
+def playout(board, n, player, rng):
+    """
+    Play uniformly random moves on board (modified in place) starting with
+    player until it is full, then return the winner.
+    """
+    empty = [cell for cell in range(n * n) if board[cell] == 0]
+    rng.shuffle(empty)
+    captures = captureTable(n)
+    limit = _PLAYOUT_LIMIT * n * n
+    while empty and limit:
+        limit -= 1
+        cell = empty.pop()
+        board[cell] = player
+        captured = None
+        for opposite, mid1, mid2 in captures[cell]:
+            if board[mid1] == -player and board[mid2] == -player and board[opposite] == player:
+                # Capturing has to be deferred in case of overlaps
+                if captured is None:
+                    captured = set()
+                captured.add(mid1)
+                captured.add(mid2)
+        if captured:
+            # Captured cells are free again, at a random place in the order
+            for c in captured:
+                board[c] = 0
+                empty.append(c)
+                j = rng.randrange(len(empty))
+                empty[j], empty[-1] = empty[-1], empty[j]
+        player = -player
+    return winner(board, n)
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'player', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, parent, player):
+        # Flat cell played to reach this node, and the colour int that played it
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = {}
+        # Moves not yet expanded (None until the node is first expanded)
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTS:
+    def __init__(self, n, seed=None):
+        self.n = n
+        self.rng = Random(seed)
+        self.root = None
+        self.size = 0
+        self.playouts = 0
+
+    def search(self, board, colour, deadline):
+        """
+        Grow the tree for colour to move on board (a list of lists, left
+        unchanged) until the process_time() deadline. Returns the most
+        visited move as (r, q), or any empty cell if the root could not be
+        expanded (deadline already passed, or the tree is full).
+        """
+        self.grow(board, colour, deadline)
+        if not self.root.children:
+            return self.anyMove(board)
+        best = max(self.root.children.values(), key=lambda child: child.visits)
+        return divmod(best.move, self.n)
+
+    def anyMove(self, board):
+        """
+        A random empty cell of board as (r, q), for when there are no root
+        moves to choose from.
+        """
+        n = self.n
+        return divmod(self.rng.choice([cell for cell in range(n * n)
+            if board[cell // n][cell % n] == 0]), n)
+
+    def visitCounts(self):
+        """
+        Visits of each root move, as {(r, q): visits}.
+        """
+        if self.root is None:
+            return {}
+        return {divmod(move, self.n): child.visits
+            for move, child in self.root.children.items()}
+
+    def grow(self, board, colour, deadline):
+        """
+        Run playouts from board for colour to move until the process_time()
+        deadline, growing the tree (and reusing it if it matches). Stops at
+        the deadline even if the root has no children yet.
+        """
+        n = self.n
+        player = colourDict[colour]
+        flat = [tile for row in board for tile in row]
+        # The root is the position after the opponent's move
+        if self.root is None or self.root.player != -player:
+            self.root = Node(None, None, -player)
+            self.size = 1
+        root = self.root
+        self.playouts = 0
+
+        while True:
+            if self.playouts % 16 == 0 and process_time() > deadline:
+                break
+            self.playouts += 1
+            node = root
+            state = flat[:]
+            toMove = player
+
+            # Selection: descend through fully expanded nodes by UCT
+            while node.untried is not None and not node.untried and node.children:
+                node = self._select(node)
+                playMove(state, n, node.move, toMove)
+                toMove = -toMove
+
+            # Expansion: add one child for an untried move
+            if node.untried is None:
+                node.untried = [cell for cell in range(n * n) if state[cell] == 0]
+                self.rng.shuffle(node.untried)
+            if node.untried and self.size < MAX_NODES:
+                move = node.untried.pop()
+                playMove(state, n, move, toMove)
+                child = Node(move, node, toMove)
+                node.children[move] = child
+                self.size += 1
+                node = child
+                toMove = -toMove
+
+            # Simulation and backpropagation
+            result = playout(state, n, toMove, self.rng)
+            while node is not None:
+                node.visits += 1
+                if result == node.player:
+                    node.wins += 1
+                elif result == 0:
+                    node.wins += 0.5
+                node = node.parent
+
+    def advance(self, action):
+        """
+        Move the root down to the child for an action that was just played,
+        keeping its subtree; any other action (e.g. STEAL) drops the tree.
+        """
+        if self.root is None or action[0] != "PLACE":
+            self.root = None
+            return
+        child = self.root.children.get(action[1] * self.n + action[2])
+        if child is None:
+            self.root = None
+            return
+        child.parent = None
+        self.root = child
+        # Rough size of the kept subtree: each playout adds at most one node
+        self.size = child.visits + 1
+
+    def _select(self, node):
+        """
+        Child of node with the highest UCT score.
+        """
+        scale = EXPLORATION * sqrt(log(node.visits))
+        best, bestScore = None, -1.0
+        for child in node.children.values():
+            score = child.wins / child.visits + scale / sqrt(child.visits)
+            if score > bestScore:
+                best, bestScore = child, score
+        return best
@@ -0,0 +1,182 @@
+"""
+Root-parallel Monte Carlo Tree Search over a pool of worker processes.
+
+Python threads cannot speed up the CPU-bound playouts, so each worker is a
+separate process running its own Player in "mcts" mode with its own tree and
+random seed. Workers are started once per game and kept for every turn:
+after each action they receive only that action (a move delta), which they
+apply to their own board and tree exactly as Player.turn does. When asked to
+search, each worker grows its tree for the given CPU time and returns the
+visit counts of the root moves, with the CPU time it has used since its last
+reply; the counts are summed and the most visited move is played.
+
+Workers are fresh interpreters started with subprocess and talk to the
+player over a socket pair (as referee.isolated does), rather than
+multiprocessing children: they can be started from any process, including
+the daemonic workers of the tournament's multiprocessing.Pool, and inherit
+no other connections, so a worker whose player goes away (even without
+calling close(), e.g. a forked player that leaves with os._exit) reads EOF
+and stops.
+
+The referee measures time.process_time() of the player's own process, which
+does not include CPU time spent in child processes, so the workers' CPU time
+is added up in cpuTime and the player reports it to the referee through
+child_time() (see referee.player.PlayerWrapper), which charges it to the
+player's clock. Under a time limit the workers therefore share the player's
+budget rather than multiply it.
+"""
+
+import os
+import sys
+import socket
+import weakref
+import subprocess
+from multiprocessing.connection import Connection
+from time import process_time
+
+# Upper bound on workers started by default
+MAX_WORKERS = 8
+
+# Worker entry point (not "-m alcos_inc.parallel": the package imports this
+# module itself, so running it as __main__ would load it twice)
+_WORKER_CODE = ("import sys; from alcos_inc.parallel import _serve; "
+    "_serve(*sys.argv[1:])")
+
+
+def _worker(connection, player, n):
+    """
+    Worker loop: keep a Player in mcts mode up to date with the game and
+    answer search requests with root visit counts and the CPU time used
+    since the last reply (the first one includes starting up). Each worker's
+    MCTS is created after the process starts, so it gets its own random seed.
+    """
+    # Imported here as alcos_inc.player imports this module
+    from alcos_inc.player import Player
+
+    mirror = Player(player, n, mode="mcts")
+    reported = 0.0
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            # the player has gone away: same as a stop message
+            message = ("stop",)
+        if message[0] == "turn":
+            _, colour, action = message
+            mirror.turn(colour, action)
+        elif message[0] == "search":
+            _, colour, seconds = message
+            mirror.mcts.grow(mirror.board, colour, process_time() + seconds)
+            # no root moves (e.g. no time to expand the root): any empty cell
+            counts = mirror.mcts.visitCounts() or \
+                {mirror.mcts.anyMove(mirror.board): 0}
+            now = process_time()
+            try:
+                connection.send((counts, now - reported))
+            except OSError:
+                connection.close()
+                return
+            reported = now
+        else:
+            connection.close()
+            return
+
+
+def _serve(fd, player, n):
+    """
+    Worker process entry point, with its socket's fd and the Player's
+    arguments as command line strings.
+    """
+    _worker(Connection(int(fd)), player, int(n))
+
+
+def _stop(connections, processes):
+    """
+    Stop the workers: ask each one to stop, then wait for (or kill) it.
+    """
+    for connection in connections:
+        try:
+            connection.send(("stop",))
+            connection.close()
+        except OSError:
+            pass
+    for process in processes:
+        try:
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    connections.clear()
+    processes.clear()
+
+
+def _worker_env():
+    """
+    Environment for a worker, able to import this package itself.
+    """
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = env.get("PYTHONPATH")
+    env["PYTHONPATH"] = root + (os.pathsep + path if path else "")
+    return env
+
+
+class RootParallelMCTS:
+    def __init__(self, player, n, workers=None):
+        """
+        Start workers (by default one per spare CPU core, at most
+        MAX_WORKERS) for a player of the given colour on an n x n board.
+        """
+        if workers is None:
+            workers = min(MAX_WORKERS, max(1, (os.cpu_count() or 2) - 1))
+        self.n = n
+        # CPU seconds the workers have reported using, over the whole game
+        self.cpuTime = 0.0
+        self.connections = []
+        self.processes = []
+        # stop the workers when this is collected or the interpreter exits,
+        # if close() was never called
+        self._finalizer = weakref.finalize(self, _stop, self.connections,
+            self.processes)
+        env = _worker_env()
+        for _ in range(workers):
+            parent, child = socket.socketpair()
+            process = subprocess.Popen(
+                [sys.executable, "-c", _WORKER_CODE,
+                    str(child.fileno()), player, str(n)],
+                pass_fds=(child.fileno(),),
+                env=env,
+            )
+            child.close()
+            self.connections.append(Connection(parent.detach()))
+            self.processes.append(process)
+
+    def turn(self, colour, action):
+        """
+        Send the action that was just played to every worker.
+        """
+        for connection in self.connections:
+            connection.send(("turn", colour, action))
+
+    def search(self, colour, seconds):
+        """
+        Search for the given CPU seconds in total, shared equally between
+        the workers, and return the move (r, q) with the most visits summed
+        over all trees. The CPU time the workers report is added to cpuTime.
+        """
+        share = seconds / len(self.connections)
+        for connection in self.connections:
+            connection.send(("search", colour, share))
+        totals = {}
+        for connection in self.connections:
+            counts, cpuTime = connection.recv()
+            self.cpuTime += cpuTime
+            for move, visits in counts.items():
+                totals[move] = totals.get(move, 0) + visits
+        return max(totals, key=totals.get)
+
+    def close(self):
+        """
+        Stop all workers.
+        """
+        self._finalizer()
@@ -1,6 +1,15 @@
-from alcos_inc.algorithms import optimalPathSearch,pathAggregator,blockStrat
+from alcos_inc.algorithms import optimalCellsFlat,blockStratFlat
+from alcos_inc.flatboard import toFlat
+from alcos_inc.incremental import PathCosts
+from alcos_inc.bitboard import BitBoard
+from alcos_inc.zobrist import cellKey, boardHash, STEAL_KEY
+from alcos_inc.search import AlphaBetaSearch
+from alcos_inc.mcts import MCTS
+from alcos_inc.parallel import RootParallelMCTS
 from random import choice, randint
+from time import process_time
 from numpy import array, roll, zeros, vectorize
+from array import array as flatArray
 
 """
 Some code below is borrowed and modified from the comp30024 team, 
@@ -43,8 +52,82 @@ _SWAP_PLAYER = { 0: 0, 1: -1, -1: 1 }
 
 ###########################################################################
 
+class TimeManager:
+    """
+    Tracks the CPU time this player has used over the whole game, the same
+    way the referee's countdown timer charges it (process time inside
+    __init__, action and turn), and splits what is left between the moves
+    we still expect to play.
+    """
+
+    # Fraction of the game's time limit kept back as a safety margin
+    RESERVE = 0.1
+
+    def __init__(self, n, limit=None):
+        """
+        The limit defaults to the specification's n^2 CPU seconds per player.
+        """
+        self.n = n
+        self.limit = n * n if limit is None else limit
+        self.used = 0.0
+        self._start = None
+
+    def __enter__(self):
+        self._start = process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.used += process_time() - self._start
+        self._start = None
+
+    def charge(self, seconds):
+        """
+        Count CPU time spent outside this process, e.g. by parallel workers
+        (all of it: the workers share the budget rather than multiply it).
+        """
+        self.used += seconds
+
+    def elapsed(self):
+        """
+        CPU seconds used so far, including the call in progress.
+        """
+        running = process_time() - self._start if self._start is not None else 0.0
+        return self.used + running
+
+    def remaining(self):
+        """
+        CPU seconds left before the safety margin is reached.
+        """
+        return max(0.0, self.limit * (1 - self.RESERVE) - self.elapsed())
+
+    def movesLeft(self, board):
+        """
+        Estimate how many more moves we will make. Games between sensible
+        players rarely need more than about 1.5n stones each, and can never
+        outlast half of the empty cells (captures aside).
+        """
+        stones = sum(1 for row in board for tile in row if tile)
+        empty = self.n * self.n - stones
+        expected = 1.5 * self.n - stones / 2
+        return max(2.0, min(expected, empty / 2 + 1), self.n / 3)
+
+    def budget(self, board):
+        """
+        CPU seconds this move should take.
+        """
+        return self.remaining() / self.movesLeft(board)
+
+    def deadlines(self, board):
+        """
+        (soft, hard) process_time() deadlines for a search started now: no
+        new iteration after the soft one, stop everything at the hard one.
+        """
+        now = process_time()
+        budget = self.budget(board)
+        return now + budget, now + min(3 * budget, self.remaining() / 2)
+
 class Player:
-    def __init__(self, player, n):
+    def __init__(self, player, n, mode="block"):
         """
         Called once at the beginning of a game to initialise this player.
         Set up an internal representation of the game state.
@@ -52,8 +135,19 @@ class Player:
         The parameter player is the string "red" if your player will
         play as Red, or the string "blue" if your player will play
         as Blue. The parameter n denotes the size of the board being used.  
+        The parameter mode picks how moves are chosen after the first turn:
+        "block" (blockStrat), "incremental" (blockStrat on distance fields
+        repaired after every turn), "alphabeta" (iterative-deepening
+        search), "mcts" (Monte Carlo Tree Search) or "parallel" (root-
+        parallel MCTS in worker processes).
         """
+        self.clock = TimeManager(n)
+        with self.clock:
+            self._init(player, n, mode)
+
+    def _init(self, player, n, mode):
         self.colour = player
+        self.mode = mode
         self.boardSize = n
         self.turnCount = 1
         self.oddCount = 0
@@ -61,9 +155,27 @@ class Player:
         # Open tiles = 0, red = 1, blue = -1
         n_row, n_col = (n,n)
         self.board = [[0 for x in range(n_col)] for y in range(n_row)]
+        # The same board flattened (flatboard.py), kept in step by place() for the searches that take it
+        self.tiles = flatArray('b', bytes(n*n))
+        # Bitboard backend used to apply moves and captures, mirrored onto self.board
+        self.bits = BitBoard(n)
+        # Zobrist hash of the position, the same value as the referee's Board.digest()
+        self.hash = 0
+        # Distance fields of both colours, repaired after every turn (only incremental mode uses them)
+        self.paths = PathCosts(self.board, n) if mode == "incremental" else None
 
         # colourDict for our int representation of colours
         self.colourDict = {'red': 1, "blue":-1, "open":0}
+
+        if self.mode == "alphabeta":
+            self.search = AlphaBetaSearch(n)
+        elif self.mode == "mcts":
+            self.mcts = MCTS(n)
+        elif self.mode == "parallel":
+            self.pool = RootParallelMCTS(player, n)
+        # CPU time the last blockStrat call took, and the number of empty cells it had then
+        self.lastBlockTime = 0.0
+        self.lastBlockEmpty = n*n
         
 
     def action(self):
@@ -73,6 +185,10 @@ class Player:
 
         The action must be represented based on the instructions for representing actions
         """
+        with self.clock:
+            return self._action()
+
+    def _action(self):
 
         # action representation: 
         # ("STEAL", ) -> only playable if BLUE as their first move of the game
@@ -96,20 +212,55 @@ class Player:
             # If we are blue, always steal
             if self.colour == 'blue':
                 action = ("STEAL",)
+        # Search for the best move
+        elif self.mode == "alphabeta":
+            soft, hard = self.clock.deadlines(self.board)
+            move = self.search.search(self.board, self.colour, self.hash, hard,
+                softDeadline=soft)[0]
+            action = ("PLACE", move[0], move[1])
+        elif self.mode == "mcts":
+            soft, hard = self.clock.deadlines(self.board)
+            move = self.mcts.search(self.board, self.colour, soft)
+            action = ("PLACE", move[0], move[1])
+        elif self.mode == "parallel":
+            budget = self.clock.budget(self.board)
+            before = self.pool.cpuTime
+            move = self.pool.search(self.colour, budget)
+            self.clock.charge(self.pool.cpuTime - before)
+            action = ("PLACE", move[0], move[1])
         # Play normally
         else:
-            # Use simpler algorithm if large board and early turns
-            if (self.turnCount < self.boardSize/3 and self.boardSize > 12):
-                bestPath = pathAggregator(optimalPathSearch(self.board, self.boardSize, self.colour))[0]
+            # Use the simpler algorithm if blockStrat no longer fits in this move's budget. Its cost
+            # is estimated afresh every move, from the last call scaled by the empty cells left, and
+            # halved on every move that falls back, so that one slow call (or a GC pause) does not
+            # rule blockStrat out for the rest of the game: it is soon timed again
+            if self.blockEstimate() > self.clock.budget(self.board):
+                self.lastBlockTime /= 2
+                if self.paths is None:
+                    bestPath = optimalCellsFlat(self.tiles, self.boardSize, self.colour)[0]
+                else:
+                    bestPath = [r*self.boardSize + q for r, q in self.paths.optimalCells(self.colour)[0]]
             # Otherwise play normally
             else:
-                bestPath = blockStrat(self.board, self.boardSize, self.colour)
+                start = process_time()
+                bestPath = blockStratFlat(self.tiles, self.boardSize, self.colour, self.paths)
+                self.lastBlockTime = process_time() - start
+                self.lastBlockEmpty = self.tiles.count(0)
 
-            randomTile = choice(bestPath)
+            # The searches pick cell ids, so only the chosen one becomes a coord
+            randomTile = divmod(choice(bestPath), self.boardSize)
             action = ("PLACE", randomTile[0], randomTile[1])
         
         return action
 
+    def blockEstimate(self):
+        """
+        Estimated CPU time of a blockStrat call now: the last call's time,
+        scaled by how many empty cells (candidate moves and search space)
+        are left compared to then.
+        """
+        return self.lastBlockTime * self.tiles.count(0) / max(1, self.lastBlockEmpty)
+
     def turn(self, player, action):
         """
         Called at the end of each player's turn to inform this player of
@@ -121,9 +272,18 @@ class Player:
         the same as what your player returned from the action method
         above. However, the referee has validated it at this point.
         """
+        with self.clock:
+            self._turn(player, action)
+
+    def _turn(self, player, action):
         # updates internal state of the game by marking the board with the colour
         # of the player that played the action
 
+        if self.mode == "mcts":
+            self.mcts.advance(action)
+        elif self.mode == "parallel":
+            self.pool.turn(player, action)
+
         self.oddCount += 1
         if self.oddCount % 2 == 0:
             self.turnCount += 1
@@ -131,11 +291,12 @@ class Player:
         # If opponent chooses to steal, that means we are red
         # Now if we are red, we need to change that 1 tile to blue
         if action[0] == 'STEAL':
-            numRedTiles, redTiles = self.getTiles('red')
-            x = redTiles[0][0]
-            y = redTiles[0][1]
-            self.board[y][x] = self.colourDict['blue']
-            self.board[x][y] = self.colourDict['open']
+            self.bits.swap()
+            self.board[:] = self.bits.toMatrix()
+            self.hash = boardHash(self.board) ^ STEAL_KEY
+            self.tiles[:] = toFlat(self.board)
+            if self.paths is not None:
+                self.paths.reset(self.board)
 
         else:
             # BORROWED FROM BOARD.PY
@@ -143,6 +304,24 @@ class Player:
 
         return
 
+    def child_time(self):
+        """
+        CPU seconds used so far by processes this player started (the
+        workers of parallel mode), which the referee charges to our clock
+        as its own timer cannot see them.
+        """
+        if self.mode == "parallel":
+            return self.pool.cpuTime
+        return 0.0
+
+    def close(self):
+        """
+        Called once the game is over (by referees that support it) to release
+        what the player holds: the worker processes of parallel mode.
+        """
+        if self.mode == "parallel":
+            self.pool.close()
+
     def getTiles(self, colour):
         """returns number of tiles of a given colour and their coordinates"""
         counter=0
@@ -165,9 +344,18 @@ class Player:
         Place a token('red' or 'blue') on the board and apply captures if 
         they exist. Return coordinates of captured tokens.
         """
-        # self[coord] = token
+        # Captures are found on the bitboard, then mirrored onto self.board
         self.board[coord[0]][coord[1]]=self.colourDict[token]
-        return self._apply_captures(coord)
+        self.tiles[coord[0]*self.boardSize + coord[1]] = self.colourDict[token]
+        captured = self.bits.place(self.colourDict[token], coord)
+        self.hash ^= cellKey(coord, self.colourDict[token])
+        for r, q in captured:
+            self.board[r][q] = self.colourDict['open']
+            self.tiles[r*self.boardSize + q] = self.colourDict['open']
+            self.hash ^= cellKey((r, q), -self.colourDict[token])
+        if self.paths is not None:
+            self.paths.set([(coord, self.colourDict[token])] + [(cell, 0) for cell in captured])
+        return captured
 
     def inside_bounds(self, coord):
         """
@@ -176,35 +364,37 @@ class Player:
         r, q = coord
         return r >= 0 and r < self.boardSize and q >= 0 and q < self.boardSize
 
-    def _apply_captures(self, coord):
-        """
-        Check coord for diamond captures, and apply these to the board
-        if they exist. Returns a list of captured token coordinates.
-        """
-        # opp_type = self._data[coord]
-        opp_type = self.board[coord[0]][coord[1]]
-        mid_type = _SWAP_PLAYER[opp_type]
-        captured = set()
-
-        # Check each capture pattern intersecting with coord
-        for pattern in _CAPTURE_PATTERNS:
-            coords = [_ADD(coord, s) for s in pattern]
-            # No point checking if any coord is outside the board!
-            if all(map(self.inside_bounds, coords)):
-                # tokens = [self._data[coord] for coord in coords]
-                tokens = [self.board[coord[0]][coord[1]] for coord in coords]
-                if tokens == [opp_type, mid_type, mid_type]:
-                    # Capturing has to be deferred in case of overlaps
-                    # Both mid cell tokens should be captured
-                    captured.update(coords[1:])
-
-        # Remove any captured tokens
-        for coord in captured:
-            # self[coord] = None
-            r = coord[0]
-            q = coord[1]
-            self.board[r][q] = self.colourDict['open']
+###########################################################################
+
+class IncrementalPlayer(Player):
+    """
+    Player that picks its moves with blockStrat, on distance fields that are
+    repaired after every turn instead of searched again (see incremental.py).
+    Run it with the referee as 'alcos_inc:IncrementalPlayer'.
+    """
+    def __init__(self, player, n):
+        super().__init__(player, n, mode="incremental")
 
-        return list(captured)
+class AlphaBetaPlayer(Player):
+    """
+    Player that picks its moves with iterative-deepening alpha-beta search.
+    Run it with the referee as 'alcos_inc:AlphaBetaPlayer'.
+    """
+    def __init__(self, player, n):
+        super().__init__(player, n, mode="alphabeta")
 
-###########################################################################
+class MCTSPlayer(Player):
+    """
+    Player that picks its moves with Monte Carlo Tree Search.
+    Run it with the referee as 'alcos_inc:MCTSPlayer'.
+    """
+    def __init__(self, player, n):
+        super().__init__(player, n, mode="mcts")
+
+class ParallelMCTSPlayer(Player):
+    """
+    Player that picks its moves with root-parallel MCTS in worker processes.
+    Run it with the referee as 'alcos_inc:ParallelMCTSPlayer'.
+    """
+    def __init__(self, player, n):
+        super().__init__(player, n, mode="parallel")
@@ -0,0 +1,103 @@
+"""
+Make/unmake move support for the agent's internal board.
+
+A Position wraps a list of lists board (the same representation as
+Player.board) and applies moves in place with push(), recording everything
+needed to take them back exactly with pop(): the placed cell, the cells
+captured by it and the change to the Zobrist hash. Search code can then walk
+a game tree on one shared board with no copies.
+"""
+
+from alcos_inc.bitboard import BitBoard
+from alcos_inc.zobrist import cellKey, boardHash, STEAL_KEY
+
+# colourDict for our int representation of colours
+colourDict = {'red': 1, "blue":-1, "open":0}
+
+# The colour that moves after the given colour
+_OTHER = {'red': 'blue', 'blue': 'red'}
+
+
+class Position:
+    def __init__(self, board, n, colour, hash=None):
+        """
+        Wrap board (modified in place) with colour ('red' or 'blue') to
+        move next. Pass the board's current Zobrist hash (e.g. Player.hash)
+        if known, otherwise it is computed from the board.
+        """
+        self.board = board
+        self.n = n
+        self.colour = colour
+        self.bits = BitBoard.fromMatrix(board)
+        self.hash = boardHash(board) if hash is None else hash
+        # Undo stack of (move, colour, captured cells, hash delta)
+        self.stack = []
+
+    def push(self, move):
+        """
+        Play move for the colour to move. Move is either a cell (r, q) or
+        an action tuple ("PLACE", r, q) / ("STEAL",). Returns the list of
+        captured cells.
+        """
+        colour = self.colour
+        if move[0] == "STEAL":
+            delta = self._steal()
+            captured = []
+        else:
+            if move[0] == "PLACE":
+                move = (move[1], move[2])
+            player = colourDict[colour]
+            self.board[move[0]][move[1]] = player
+            captured = self.bits.place(player, move)
+            delta = cellKey(move, player)
+            for r, q in captured:
+                self.board[r][q] = 0
+                delta ^= cellKey((r, q), -player)
+
+        self.hash ^= delta
+        self.stack.append((move, colour, captured, delta))
+        self.colour = _OTHER[colour]
+        return captured
+
+    def pop(self):
+        """
+        Take back the last pushed move, restoring the board, captured
+        stones, hash and colour to move exactly. Returns the move.
+        """
+        move, colour, captured, delta = self.stack.pop()
+        if move[0] == "STEAL":
+            self._steal()
+        else:
+            player = colourDict[colour]
+            self.board[move[0]][move[1]] = 0
+            self.bits.set(move, 0)
+            for coord in captured:
+                self.board[coord[0]][coord[1]] = -player
+                self.bits.set(coord, -player)
+
+        self.hash ^= delta
+        self.colour = colour
+        return move
+
+    def depth(self):
+        """
+        Number of moves currently pushed.
+        """
+        return len(self.stack)
+
+    def _steal(self):
+        """
+        Apply the STEAL transform (its own inverse) to the board and return
+        the resulting hash delta.
+        """
+        delta = STEAL_KEY
+        stones = [(r, q, tile) for r, row in enumerate(self.board)
+            for q, tile in enumerate(row) if tile]
+        for r, q, tile in stones:
+            self.board[r][q] = 0
+            delta ^= cellKey((r, q), tile)
+        for r, q, tile in stones:
+            self.board[q][r] = -tile
+            delta ^= cellKey((q, r), -tile)
+        self.bits.swap()
+        return delta
@@ -0,0 +1,217 @@
+"""
+Iterative-deepening negamax search with alpha-beta pruning.
+
+Positions are scored with the edge-to-edge path engine: the value for the
+colour to move is (opponent's best cost - own best cost), so every stone the
+opponent still needs is good and every stone we still need is bad. Moves are
+searched on a single shared board through Position.push/pop, ordered by the
+principal variation of the previous iteration, then the transposition
+table's best move, then cells on both colours' optimal paths.
+
+Each iteration searches one ply deeper until the deadline passes; the move
+returned is always the best one from the last completed iteration.
+"""
+
+import time
+
+from alcos_inc.algorithms import optimalCells
+from alcos_inc.position import Position
+from alcos_inc.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from alcos_inc.zobrist import TURN_KEY
+
+# Score of a won position (reduced by ply so quicker wins are preferred)
+WIN = 10000
+
+# Most candidate moves tried at any node, after ordering
+DEFAULT_WIDTH = 12
+
+# Deepest iteration ever started
+MAX_DEPTH = 32
+
+_OTHER = {'red': 'blue', 'blue': 'red'}
+
+
+def _toTable(value, ply):
+    """
+    Value as stored in the transposition table: win scores count plies from
+    the stored position rather than from the root, so that they stay right
+    when the position is met again at another ply.
+    """
+    if value >= WIN - MAX_DEPTH:
+        return value + ply
+    if value <= -(WIN - MAX_DEPTH):
+        return value - ply
+    return value
+
+
+def _fromTable(value, ply):
+    """
+    Value of a transposition table entry met at ply (undoes _toTable).
+    """
+    if value >= WIN - MAX_DEPTH:
+        return value - ply
+    if value <= -(WIN - MAX_DEPTH):
+        return value + ply
+    return value
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the deadline has passed."""
+
+
+class AlphaBetaSearch:
+    def __init__(self, n, table=None, width=DEFAULT_WIDTH):
+        """
+        Search engine for an n x n board. A TranspositionTable may be shared
+        between moves (a new one is made if not given).
+        """
+        self.n = n
+        self.table = table if table is not None else TranspositionTable()
+        self.width = width
+        self.nodes = 0
+        self.depth = 0
+        self.pv = []
+
+    def search(self, board, colour, hash=None, deadline=None, maxDepth=MAX_DEPTH,
+            softDeadline=None):
+        """
+        Search board (restored before returning) for colour to move. The
+        deadline is a time.process_time() value after which no more search
+        is done; no new iteration is started after softDeadline. Returns
+        (best move (r, q), value, depth completed).
+        """
+        position = Position(board, self.n, colour, hash)
+        self.deadline = deadline
+        self.nodes = 0
+        self.pv = []
+        bestMove, bestValue, completed = None, 0, 0
+
+        try:
+            for depth in range(1, maxDepth + 1):
+                value, pv = self._negamax(position, depth, -WIN - 1, WIN + 1, 0)
+                if not pv:
+                    break
+                bestMove, bestValue, completed = pv[0], value, depth
+                self.pv = pv
+                # A forced result will not change with more depth
+                if abs(value) >= WIN - MAX_DEPTH:
+                    break
+                if softDeadline is not None and time.process_time() > softDeadline:
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            # Unwind any moves left on the board by an interrupted iteration
+            while position.depth():
+                position.pop()
+
+        # Not even the first iteration finished: fall back to move ordering,
+        # or to any empty cell if there are no candidate moves at all
+        if bestMove is None:
+            moves = self._orderedMoves(position, 0, None)[1]
+            if moves:
+                bestMove = moves[0]
+            else:
+                bestMove = next(((r, q) for r in range(self.n)
+                    for q in range(self.n) if board[r][q] == 0), None)
+        self.depth = completed
+        return bestMove, bestValue, completed
+
+    def _negamax(self, position, depth, alpha, beta, ply):
+        """
+        Negamax value of position for the colour to move, searched depth
+        plies deeper. Returns (value, principal variation).
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % 16 == 0 and \
+                time.process_time() > self.deadline:
+            raise SearchTimeout()
+
+        key = position.hash ^ (TURN_KEY if position.colour == 'blue' else 0)
+        entry = self.table.probe(key)
+        ttMove = None
+        if entry is not None:
+            value, bound, entryDepth, ttMove = entry
+            value = _fromTable(value, ply)
+            if entryDepth >= depth and ply > 0:
+                if bound == EXACT:
+                    return value, [ttMove] if ttMove else []
+                if bound == LOWER and value >= beta:
+                    return value, [ttMove] if ttMove else []
+                if bound == UPPER and value <= alpha:
+                    return value, [ttMove] if ttMove else []
+
+        costs, moves = self._orderedMoves(position, ply, ttMove)
+        ownCost, oppCost = costs
+
+        # Game over: the opponent has just connected (or we somehow have)
+        if oppCost == 0:
+            return -(WIN - ply), []
+        if ownCost == 0:
+            return WIN - ply, []
+        if depth == 0 or not moves:
+            return oppCost - ownCost, []
+
+        alphaOriginal = alpha
+        bestValue, bestPV = -WIN - 1, []
+        for move in moves:
+            position.push(move)
+            try:
+                value, childPV = self._negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                position.pop()
+            value = -value
+            if value > bestValue:
+                bestValue, bestPV = value, [move] + childPV
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if bestValue <= alphaOriginal:
+            bound = UPPER
+        elif bestValue >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, _toTable(bestValue, ply), bound, depth, bestPV[0])
+        return bestValue, bestPV
+
+    def _orderedMoves(self, position, ply, ttMove):
+        """
+        Best costs (own, opponent) for the colour to move, and its candidate
+        moves: the previous principal variation's move at this ply, the
+        table move, then cells on both colours' optimal paths, then cells
+        on just one of them.
+        """
+        colour = position.colour
+        ownCells, ownCost = optimalCells(position.board, self.n, colour)
+        oppCells, oppCost = optimalCells(position.board, self.n, _OTHER[colour])
+
+        # Cells on both optimal path sets both extend us and block them
+        oppSet = set(oppCells)
+        shared = [cell for cell in ownCells if cell in oppSet]
+        ownSet = set(ownCells)
+        moves = shared + [cell for cell in ownCells if cell not in oppSet] + \
+            [cell for cell in oppCells if cell not in ownSet]
+
+        first = []
+        if self._onPV(position, ply):
+            first.append(self.pv[ply])
+        if ttMove is not None and ttMove[0] != "STEAL" and ttMove not in first:
+            first.append(ttMove)
+        for move in reversed(first):
+            if position.board[move[0]][move[1]] == 0:
+                if move in moves:
+                    moves.remove(move)
+                moves.insert(0, move)
+        return (ownCost, oppCost), moves[:self.width]
+
+    def _onPV(self, position, ply):
+        """
+        True iff the moves played so far follow the previous iteration's
+        principal variation, so that its move at this ply should go first.
+        """
+        if ply >= len(self.pv):
+            return False
+        played = [entry[0] for entry in position.stack[-ply:]] if ply else []
+        return played == self.pv[:ply]
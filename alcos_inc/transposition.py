@@ -0,0 +1,135 @@
+"""
+Fixed-capacity transposition table for the agent's search, keyed by the
+Zobrist hash of a position (see alcos_inc/zobrist.py).
+
+Entries live in preallocated parallel arrays rather than a dict of objects,
+so the table's memory is fixed when it is created. Slots are grouped in
+buckets of two: the first slot is depth-preferred (only replaced by an entry
+searched at least as deep), the second is always-replace, so deep results
+survive while recent shallow ones still get cached.
+"""
+
+from array import array
+
+# Bound types of a stored value
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Bytes per slot: key (8) + value (8) + depth (1) + bound (1) + move (2)
+_SLOT_BYTES = 20
+
+# The referee's space limit is 100MB per player (-s, see the specification),
+# so never let the table take more than half of it
+DEFAULT_MEGABYTES = 8
+MAX_MEGABYTES = 50
+
+# Moves are stored as r * _MOVE_BASE + q (boards are at most 15 x 15)
+_MOVE_BASE = 16
+_NO_MOVE = -1
+_STEAL_MOVE = -2
+
+
+class TranspositionTable:
+    def __init__(self, megabytes=DEFAULT_MEGABYTES):
+        """
+        Allocate a table using at most megabytes of memory (clamped to
+        MAX_MEGABYTES).
+        """
+        megabytes = min(megabytes, MAX_MEGABYTES)
+        self.buckets = max(1, int(megabytes * 2**20) // (2 * _SLOT_BYTES))
+        size = 2 * self.buckets
+        self.keys = array('Q', bytes(8 * size))
+        self.values = array('d', bytes(8 * size))
+        # Depth -1 marks an empty slot
+        self.depths = array('b', [-1]) * size
+        self.bounds = array('b', bytes(size))
+        self.moves = array('h', [_NO_MOVE]) * size
+
+        # Counters for tuning
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """
+        Look up a position hash. Returns (value, bound, depth, move) if it is
+        stored, otherwise None.
+        """
+        slot = 2 * (key % self.buckets)
+        for i in (slot, slot + 1):
+            if self.depths[i] >= 0 and self.keys[i] == key:
+                self.hits += 1
+                return (self.values[i], self.bounds[i], self.depths[i],
+                    _decodeMove(self.moves[i]))
+        self.misses += 1
+        # The bucket holds other positions that share its index
+        if self.depths[slot] >= 0 or self.depths[slot + 1] >= 0:
+            self.collisions += 1
+        return None
+
+    def store(self, key, value, bound, depth, move=None):
+        """
+        Store a search result for a position hash. move is the best cell
+        (r, q), ("STEAL",) or None.
+        """
+        slot = 2 * (key % self.buckets)
+        depth = min(depth, 127)
+        self.stores += 1
+        if self.depths[slot] < 0 or self.keys[slot] == key or depth >= self.depths[slot]:
+            # Keep the displaced deep entry in the always-replace slot
+            if self.depths[slot] >= 0 and self.keys[slot] != key:
+                self._write(slot + 1, self.keys[slot], self.values[slot],
+                    self.bounds[slot], self.depths[slot], self.moves[slot])
+            self._write(slot, key, value, bound, depth, _encodeMove(move))
+        else:
+            self._write(slot + 1, key, value, bound, depth, _encodeMove(move))
+
+    def clear(self):
+        """
+        Empty the table and reset its counters.
+        """
+        self.depths = array('b', [-1]) * len(self.depths)
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def stats(self):
+        """
+        Counters for tuning: hits, misses, collisions, stores and the
+        fraction of probes that hit.
+        """
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hitRate': self.hits / probes if probes else 0.0,
+        }
+
+    def megabytes(self):
+        """
+        Memory held by the slot arrays, in MB.
+        """
+        return 2 * self.buckets * _SLOT_BYTES / 2**20
+
+    def _write(self, i, key, value, bound, depth, move):
+        self.keys[i] = key
+        self.values[i] = value
+        self.bounds[i] = bound
+        self.depths[i] = depth
+        self.moves[i] = move
+
+
+def _encodeMove(move):
+    if move is None:
+        return _NO_MOVE
+    if move[0] == "STEAL":
+        return _STEAL_MOVE
+    return move[0] * _MOVE_BASE + move[1]
+
+
+def _decodeMove(code):
+    if code == _NO_MOVE:
+        return None
+    if code == _STEAL_MOVE:
+        return ("STEAL",)
+    return divmod(code, _MOVE_BASE)
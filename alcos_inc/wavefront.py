@@ -0,0 +1,65 @@
+"""
+Vectorised connection costs for many boards at once.
+
+batchConnectionCost takes a stack of B boards (a B x n x n int8 array, with
+the agent's 1 / -1 / 0 tokens) and finds, for every board, the same value as
+algorithms.connectionCost: the minimum number of tokens the colour still
+needs to connect its edges. Instead of one Python search per board, the
+distance fields of all boards are relaxed together, a whole wavefront at a
+time: every cell takes the cheapest of its six hex neighbours plus its own
+cost (0 for our tokens, 1 for empty cells, opponent tokens are never
+entered), over and over until no cell changes. Each pass is a handful of
+NumPy operations over the whole stack, so the cost of a batch grows with
+the length of the longest path rather than with B.
+
+Blue's boards are transposed so that both colours connect the first row to
+the last: the six hex steps are symmetric under the transpose.
+"""
+
+from numpy import asarray, array_equal, empty, full, int8, int16, minimum, where
+
+from alcos_inc.flatboard import colourDict
+
+# Fewest boards for which one batch is quicker than a kernel search per board
+# (a pass costs about as much for one board as for a few)
+MIN_BATCH = 6
+
+# Neighbour hex steps, as (row, column) offsets
+_HEX_STEPS = ((0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1))
+
+
+def batchConnectionCost(boards, colour):
+    """
+    Minimum number of tokens the colour still needs to connect its edges
+    on each of a stack of B boards (B x n x n, 1 red, -1 blue, 0 empty), as
+    an array of B costs capped at n * n (no path at all).
+    """
+    boards = asarray(boards, dtype=int8)
+    count, n = boards.shape[0], boards.shape[1]
+    player = colourDict[colour]
+    if colour == 'blue':
+        boards = boards.transpose(0, 2, 1)
+    unreached = n*n + 1
+    cellCost = where(boards == player, 0,
+        where(boards == 0, 1, unreached)).astype(int16)
+
+    # Distances, with a border of unreached cells so every hex step is a
+    # slice of the same shape as the board
+    dist = full((count, n + 2, n + 2), unreached, dtype=int16)
+    inner = dist[:, 1:-1, 1:-1]
+    inner[:, 0, :] = cellCost[:, 0, :]
+    shifts = [dist[:, 1+r:1+r+n, 1+q:1+q+n] for r, q in _HEX_STEPS]
+    best = empty((count, n, n), dtype=int16)
+    relaxed = empty((count, n, n), dtype=int16)
+
+    while True:
+        minimum(shifts[0], shifts[1], out=best)
+        for shift in shifts[2:]:
+            minimum(best, shift, out=best)
+        best += cellCost
+        minimum(best, inner, out=relaxed)
+        if array_equal(relaxed, inner):
+            break
+        inner[...] = relaxed
+
+    return minimum(inner[:, n-1, :].min(axis=1), n*n)
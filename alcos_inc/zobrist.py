@@ -0,0 +1,47 @@
+"""
+Zobrist keys for hashing board positions. One 64-bit key per (cell, colour)
+plus a key marking that the STEAL transform has been applied, so a position
+hash is the XOR of the keys of its stones and can be updated in O(changed
+cells) as stones are placed and captured.
+
+Keys are generated from a fixed seed over a 15 x 15 grid (the largest board
+the referee allows), so every board size and every process share the same
+values for a given position.
+"""
+
+from random import Random
+
+# Largest supported board size
+_MAX_N = 15
+
+_rng = Random(30024)
+
+# Keys indexed by colour int (red = 1, blue = -1), then by r * _MAX_N + q
+CELL_KEYS = {}
+CELL_KEYS[1] = [_rng.getrandbits(64) for _ in range(_MAX_N * _MAX_N)]
+CELL_KEYS[-1] = [_rng.getrandbits(64) for _ in range(_MAX_N * _MAX_N)]
+
+# XORed in once blue has played STEAL
+STEAL_KEY = _rng.getrandbits(64)
+
+# XORed in by search code when blue is to move (the referee never uses it)
+TURN_KEY = _rng.getrandbits(64)
+
+
+def cellKey(coord, colour):
+    """
+    Key for a stone of colour int (1 or -1) at coord (r, q).
+    """
+    return CELL_KEYS[colour][coord[0] * _MAX_N + coord[1]]
+
+
+def boardHash(board):
+    """
+    Hash of every stone on a list of lists board (not including STEAL_KEY).
+    """
+    h = 0
+    for r, row in enumerate(board):
+        for q, tile in enumerate(row):
+            if tile:
+                h ^= CELL_KEYS[tile][r * _MAX_N + q]
+    return h
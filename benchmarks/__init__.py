@@ -0,0 +1,4 @@
+"""
+Benchmarks for the hot paths of the alcos_inc agent. Each module can be run
+from the repository root, e.g. `python -m benchmarks.paths`.
+"""
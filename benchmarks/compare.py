@@ -0,0 +1,95 @@
+"""
+Diff two JSON result files written by benchmarks.hotpaths (e.g. before and
+after a change) and flag every benchmark whose median latency grew by more
+than the threshold. Exits with status 1 if there are any regressions, so it
+can guard a commit or CI job. Both runs should use the same options on the
+same, otherwise idle machine; on a shared or single-core machine, raise the
+repeats (-r) or the threshold to stay above the noise.
+
+Usage: python -m benchmarks.compare BASELINE CURRENT [-t THRESHOLD]
+           [-m STAT] [-a]
+"""
+
+import sys
+import json
+import argparse
+
+# Relative slowdown flagged as a regression by default
+THRESHOLD = 0.10
+
+# Statistics that can be compared
+_STATS = ("median_us", "p95_us", "mean_us")
+
+
+def compare(baseline, current, threshold=THRESHOLD, stat="median_us"):
+    """
+    Compare the results of two runs. Returns a list of (key, baseline
+    value, current value, relative change, flag) for every benchmark in
+    both runs, where flag is "REGRESSION", "improved" or "".
+    """
+    rows = []
+    for key, old in baseline["results"].items():
+        new = current["results"].get(key)
+        if new is None or not old[stat]:
+            continue
+        change = new[stat] / old[stat] - 1
+        if change > threshold:
+            flag = "REGRESSION"
+        elif change < -threshold:
+            flag = "improved"
+        else:
+            flag = ""
+        rows.append((key, old[stat], new[stat], change, flag))
+    return rows
+
+
+def get_options(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.compare",
+        description="diff two benchmarks.hotpaths JSON result files.",
+    )
+    parser.add_argument("baseline", help="results of the earlier run.")
+    parser.add_argument("current", help="results of the later run.")
+    parser.add_argument(
+        "-t", "--threshold", type=float, default=THRESHOLD,
+        help="relative slowdown flagged as a regression (default: "
+        "%(default)s, i.e. 10%%).",
+    )
+    parser.add_argument(
+        "-m", "--stat", choices=_STATS, default="median_us",
+        help="statistic to compare (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-a", "--all", action="store_true",
+        help="print every benchmark, not only those that changed by more "
+        "than the threshold.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = get_options(argv)
+    with open(options.baseline) as file:
+        baseline = json.load(file)
+    with open(options.current) as file:
+        current = json.load(file)
+
+    rows = compare(baseline, current, options.threshold, options.stat)
+    print(f"{'benchmark':<40} {'baseline':>10} {'current':>10} "
+        f"{'change':>8}")
+    for key, old, new, change, flag in rows:
+        if flag or options.all:
+            print(f"{key:<40} {old:>10.1f} {new:>10.1f} {change:>+7.1%} "
+                f"{flag}")
+    regressions = sum(1 for row in rows if row[4] == "REGRESSION")
+    improved = sum(1 for row in rows if row[4] == "improved")
+    missing = len(set(baseline["results"]) - set(current["results"]))
+    print(f"{len(rows)} compared ({options.stat}, threshold "
+        f"{options.threshold:.0%}): {regressions} regressions, {improved} "
+        f"improved" + (f", {missing} missing from current" if missing else ""))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Seeded position corpora for the benchmarks: random but reachable positions
+(tokens placed alternately, with diamond captures applied) for every board
+size the referee allows and several fill levels. The same seed, size and
+fill level always give the same positions, so timings from different runs
+or commits are measured on identical inputs.
+"""
+
+from random import Random
+
+from alcos_inc.bitboard import BitBoard
+
+# Board sizes allowed by the referee
+SIZES = range(3, 16)
+
+# Fractions of the board's cells holding a token
+FILLS = (0.1, 0.3, 0.5, 0.7)
+
+# Default seed for every corpus
+SEED = 30024
+
+# Give up filling a board after this many moves per cell (captures keep
+# emptying cells, so a fill level is not always reachable)
+_MAX_MOVES_PER_CELL = 4
+
+
+def positions(n, fill, count, seed=SEED):
+    """
+    List of count (board, colour) positions on an n x n board with about
+    fill * n * n tokens, in the agent's list of lists representation (red =
+    1, blue = -1), with colour ('red' or 'blue') the colour to move next.
+    """
+    rng = Random(f"{seed}:{n}:{fill}")
+    return [_position(n, fill, rng) for _ in range(count)]
+
+
+def _position(n, fill, rng):
+    """
+    Play random moves until the fill level is reached, never making a move
+    that would win the game (such moves are taken back and another is
+    tried), so every position is still in play.
+    """
+    bits = BitBoard(n)
+    target = int(fill * n * n)
+    player = 1
+    tokens = 0
+    for _ in range(_MAX_MOVES_PER_CELL * n * n):
+        if tokens >= target:
+            break
+        board = bits.toMatrix()
+        empty = [(r, q) for r in range(n) for q in range(n) if not board[r][q]]
+        before = dict(bits.stones)
+        captured = bits.place(player, rng.choice(empty))
+        if bits.hasWon(player):
+            bits.stones = before
+            continue
+        tokens += 1 - len(captured)
+        player = -player
+    return bits.toMatrix(), "red" if player == 1 else "blue"
+
+
+def moves(board, n, count, rng):
+    """
+    Up to count distinct empty cells of board, chosen with rng.
+    """
+    empty = [(r, q) for r in range(n) for q in range(n) if not board[r][q]]
+    return rng.sample(empty, min(count, len(empty)))
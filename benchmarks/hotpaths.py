@@ -0,0 +1,304 @@
+"""
+Time the agent's hot paths (lineHeuristicAlgo and the exact
+kernel.lineSearch, optimalPathSearch, blockStrat and _apply_captures) and a
+whole move decision of the block mode and incremental mode players
+(Player.action and IncrementalPlayer.action) on the seeded corpora of
+benchmarks.corpus, for every board size and fill level. Every call is timed
+on its own after a warm-up, and the median and 95th percentile latency of
+each benchmark are printed and optionally written as JSON, which
+benchmarks.compare diffs between runs.
+
+Usage: python -m benchmarks.hotpaths [-n SIZES] [-f FILLS] [-b BENCHMARKS]
+           [-p POSITIONS] [-r REPEATS] [-w WARMUP] [-o OUTPUT]
+"""
+
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+from random import Random
+from statistics import median
+
+from alcos_inc.algorithms import lineHeuristicAlgo, optimalPathSearch
+from alcos_inc.algorithms import blockStrat, optimalCells, _apply_captures
+from alcos_inc.flatboard import toFlat
+from alcos_inc.kernel import lineSearch
+from alcos_inc.player import Player, IncrementalPlayer
+from benchmarks.corpus import SIZES, FILLS, SEED, positions, moves
+
+# Cells placed (and checked for captures) per position by _apply_captures
+_CAPTURE_MOVES = 8
+
+
+def _line_heuristic(n, corpus, rng, search=lineHeuristicAlgo):
+    """
+    One A* search per position, between random cells on the mover's edges.
+    """
+    calls = []
+    for board, colour in corpus:
+        x, y = rng.randrange(n), rng.randrange(n)
+        if colour == "red":
+            start, goal = (0, x), (n - 1, y)
+        else:
+            start, goal = (x, 0), (y, n - 1)
+        calls.append(lambda b=board, s=start, g=goal, c=colour:
+            search(b, s, g, n, c))
+    return calls
+
+
+def _line_search(n, corpus, rng):
+    """
+    The same searches as _line_heuristic, with the search kernel.
+    """
+    return _line_heuristic(n, corpus, rng, search=lineSearch)
+
+
+def _optimal_path(n, corpus, rng):
+    return [lambda b=board, c=colour: optimalPathSearch(b, n, c)
+        for board, colour in corpus]
+
+
+def _block(n, corpus, rng):
+    return [lambda b=board, c=colour: blockStrat(b, n, c)
+        for board, colour in _connectable(n, corpus)]
+
+
+def _captures(n, corpus, rng):
+    """
+    _apply_captures after placing a token of the colour to move on one of
+    several empty cells. It changes the board, so each call gets a fresh
+    copy, made before the timer starts (see time_calls).
+    """
+    calls = []
+    token = {"red": 1, "blue": -1}
+    for board, colour in corpus:
+        for r, q in moves(board, n, _CAPTURE_MOVES, rng):
+            def setup(b=board, r=r, q=q, t=token[colour]):
+                copy = [row[:] for row in b]
+                copy[r][q] = t
+                return copy, (r, q)
+            calls.append(
+                (setup, lambda b, coord: _apply_captures(b, n, coord)))
+    return calls
+
+
+def _move(n, corpus, rng, player_cls=Player):
+    """
+    A whole move decision of the default (block mode) Player. Each call
+    gets a fresh Player, made before the timer starts, so that no call sees
+    the clock or blockStrat timings left by the ones before it (which could
+    make it fall back to optimalCells and time a different code path).
+    """
+    calls = []
+    for board, colour in _connectable(n, corpus):
+        def setup(b=board, colour=colour):
+            player = player_cls(colour, n)
+            player.board = [row[:] for row in b]
+            player.tiles[:] = toFlat(player.board)
+            if player.paths is not None:
+                player.paths.reset(player.board)
+            player.turnCount = 2
+            return (player,)
+        calls.append((setup, lambda player: player.action()))
+    return calls
+
+
+def _incremental_move(n, corpus, rng):
+    """
+    The same move decisions, by the incremental mode Player.
+    """
+    return _move(n, corpus, rng, player_cls=IncrementalPlayer)
+
+
+def _connectable(n, corpus):
+    """
+    The positions in which the colour to move can still connect its edges
+    (blockStrat needs at least one optimal cell to choose from).
+    """
+    return [(board, colour) for board, colour in corpus
+        if optimalCells(board, n, colour)[0]]
+
+
+# Benchmark name -> builder of its calls for a corpus; a call is either a
+# function of no arguments, or a (setup, function) pair where setup()
+# returns the arguments (and is not timed)
+BENCHMARKS = {
+    "lineHeuristicAlgo": _line_heuristic,
+    "lineSearch": _line_search,
+    "optimalPathSearch": _optimal_path,
+    "blockStrat": _block,
+    "_apply_captures": _captures,
+    "Player.action": _move,
+    "IncrementalPlayer.action": _incremental_move,
+}
+
+
+def time_calls(calls, repeats, warmup):
+    """
+    Run every call warmup times untimed, then repeats times timed. Returns
+    the list of timings in seconds, one per timed call.
+    """
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for round in range(warmup + repeats):
+            for call in calls:
+                if isinstance(call, tuple):
+                    setup, function = call
+                    args = setup()
+                else:
+                    function, args = call, ()
+                start = time.perf_counter()
+                function(*args)
+                elapsed = time.perf_counter() - start
+                if round >= warmup:
+                    timings.append(elapsed)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return timings
+
+
+def percentile(timings, p):
+    """
+    The p-th percentile (nearest rank) of a non-empty list of timings.
+    """
+    ordered = sorted(timings)
+    rank = max(1, -(-p * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarise(timings):
+    """
+    Latency statistics of a list of timings, in microseconds.
+    """
+    return {
+        "calls": len(timings),
+        "median_us": median(timings) * 1e6,
+        "p95_us": percentile(timings, 95) * 1e6,
+        "mean_us": sum(timings) / len(timings) * 1e6,
+    }
+
+
+def run(sizes=SIZES, fills=FILLS, names=tuple(BENCHMARKS), count=8,
+        repeats=5, warmup=1, seed=SEED, out=sys.stdout):
+    """
+    Run the benchmarks and return the results as a JSON-serialisable dict,
+    printing one line per benchmark, size and fill level as it finishes.
+    Results are keyed "name/n=N/fill=F".
+    """
+    results = {}
+    print(f"{'benchmark':<24} {'n':>3} {'fill':>5} {'calls':>6} "
+        f"{'median (us)':>12} {'p95 (us)':>12}", file=out)
+    for name in names:
+        for n in sizes:
+            for fill in fills:
+                corpus = positions(n, fill, count, seed)
+                rng = Random(f"{seed}:{name}:{n}:{fill}")
+                calls = BENCHMARKS[name](n, corpus, rng)
+                if not calls:
+                    continue
+                stats = summarise(time_calls(calls, repeats, warmup))
+                results[f"{name}/n={n}/fill={fill}"] = stats
+                print(f"{name:<24} {n:>3} {fill:>5} {stats['calls']:>6} "
+                    f"{stats['median_us']:>12.1f} {stats['p95_us']:>12.1f}",
+                    file=out, flush=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": seed,
+            "positions": count,
+            "repeats": repeats,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+
+
+def _parse_list(convert):
+    def parse(text):
+        return [convert(part) for part in text.split(",")]
+    return parse
+
+
+def _parse_sizes(text):
+    sizes = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        sizes.extend(range(int(low), int(high or low) + 1))
+    if not sizes or any(n not in SIZES for n in sizes):
+        raise argparse.ArgumentTypeError("board sizes must be in 3..15")
+    return sizes
+
+
+def get_options(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.hotpaths",
+        description="time the agent's hot paths on seeded position corpora.",
+    )
+    parser.add_argument(
+        "-n", "--sizes", type=_parse_sizes, default=list(SIZES),
+        help="board sizes, e.g. '5', '3-15' or '5,7,9' (default: 3-15).",
+    )
+    parser.add_argument(
+        "-f", "--fills", type=_parse_list(float), default=list(FILLS),
+        help="comma separated fill levels (default: "
+        f"{','.join(map(str, FILLS))}).",
+    )
+    parser.add_argument(
+        "-b", "--benchmarks", type=_parse_list(str), default=list(BENCHMARKS),
+        help=f"comma separated benchmarks (default: all of "
+        f"{','.join(BENCHMARKS)}).",
+    )
+    parser.add_argument(
+        "-p", "--positions", type=int, default=8,
+        help="positions per size and fill level (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=5,
+        help="timed runs over every position (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-w", "--warmup", type=int, default=1,
+        help="untimed runs over every position first (default: "
+        "%(default)s).",
+    )
+    parser.add_argument(
+        "-s", "--seed", type=int, default=SEED,
+        help="corpus seed (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, default=None,
+        help="write the results to this JSON file.",
+    )
+    options = parser.parse_args(argv)
+    unknown = set(options.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    return options
+
+
+def main(argv=None):
+    options = get_options(argv)
+    report = run(
+        options.sizes,
+        options.fills,
+        options.benchmarks,
+        max(1, options.positions),
+        max(1, options.repeats),
+        max(0, options.warmup),
+        options.seed,
+    )
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Compare the original n^2 A* fan-out (pairwisePathSearch, a frozen copy of
+the original code kept in this module) against the single pass edge-to-edge
+engine (optimalPathSearch) on seeded random positions for every supported
+board size.
+
+Usage: python -m benchmarks.paths [repeats]
+"""
+
+import sys
+import time
+from queue import PriorityQueue
+from random import Random
+
+from alcos_inc.algorithms import optimalPathSearch
+
+# Frozen copy of the original n^2 A* fan-out (alcos_inc/algorithms.py before
+# optimalPathSearch replaced it), kept here verbatim so that the comparison
+# is always against the code that was replaced: pairwisePathSearch in
+# alcos_inc.algorithms has since been moved onto the flat board and the
+# shared geometry tables
+
+# colourDict for our int representation of colours
+colourDict = {'red': 1, "blue":-1, "open":0}
+
+'Heuristic function which calculates node distance to goal based on row and column distance'
+def distance(location,goal):
+    locationCube = offsetToCube(location)
+    goalCube = offsetToCube(goal)
+    return (abs(locationCube[0] -goalCube[0]) + abs(locationCube[1] - goalCube[1]) + abs (locationCube[2] - goalCube[2]))/2
+
+'Generates children based on an offset list and board location/proximity'
+def generateChildren(board, location, n, colour):
+    children = []
+    offsets = [(0,-1),(1,-1),(-1,0),(1,0),(-1,1),(0,1)]
+    for x,y in offsets:
+        if ((location[0] + x in range(0,n) and location[1] + y in range(0,n)) and (board[location[0] + x][location[1] + y] != -colourDict[colour])):
+            children.append((location[0] + x, location[1] + y))
+    return children
+
+'Change co-ordinates from offset to cube'
+def offsetToCube(node):
+    q = node[1] - (node[0] - node[0]&1)/2
+    r = node[0]
+    return [q,r, -q-r]
+
+def lineHeuristicAlgo(board, start, goal, n, colour):
+    pq = PriorityQueue()
+    pq.put((0,tuple(start)))
+    previousDict = {}
+    currCost = {}
+    previousDict[tuple(start)] = None
+
+    if board[start[0]][start[1]] == colourDict[colour]:
+        currCost[tuple(start)] = 0
+    else:
+        currCost[tuple(start)] = 1
+
+    while not pq.empty():
+        currNode = pq.get()[1]
+
+        if currNode == goal:
+            break
+        
+        for nextNode in generateChildren(board, currNode, n, colour):
+            if board[currNode[0]][currNode[1]] == colourDict[colour]:
+                nextCost = currCost[currNode]
+            else:
+                nextCost = currCost[currNode] + 1
+            if nextNode not in currCost or nextCost < currCost[nextNode]:
+                currCost[nextNode] = nextCost
+                pq.put((distance(nextNode, goal) + currCost[nextNode], nextNode))
+                previousDict[nextNode] = currNode
+    return previousDict, currCost
+
+def pairwisePathSearch(board, n, colour):
+    bestCost = n*n
+    bestPath = []
+    pathList = {}
+    for x in range(0,n):
+        for y in range (0,n):
+            if colour == 'red':
+                # Check if starting or ending node is of opponents colour
+                if -colourDict[colour] in [board[0][x], board[n-1][y]]:
+                    continue
+
+                # Run A*
+                previousDict, currCost = lineHeuristicAlgo(board,(0,x),(n-1,y),n, colour)
+
+                # If there is no valid path, lineHeuristicAlgo will return zero on whathever the goal is - must test for this
+                # Otherwise, rebuild the path from the dict that lineHeuristic algo makes
+                if (n-1,y) in currCost.keys():
+                    if currCost[(n-1,y)] <= bestCost:
+                        bestCost = currCost[(n-1,y)]
+                        bestPath = buildPath(previousDict, (n-1,y), board)
+                        # Store the path in pathlist
+                        pathList[bestPath] = bestCost
+            # Same as above, but with inverted co-ordinates
+            else:
+                if -colourDict[colour] in [board[x][0], board[y][n-1]]:
+                    continue
+                previousDict, currCost = lineHeuristicAlgo(board,(x,0),(y,n-1),n, colour)
+
+                if (y,n-1) in currCost.keys():
+                    if currCost[(y,n-1)] <= bestCost:
+                        bestCost = currCost[(y,n-1)]
+                        bestPath = buildPath(previousDict, (y,n-1), board)
+                        pathList[bestPath] = bestCost
+
+    bestPaths = []
+    # If the path has optimal cost, add it to the pathlist
+    for x in pathList.keys():
+        if pathList[x] == bestCost:
+            bestPaths.append(x)
+    
+    return (bestPaths, bestCost)
+
+def buildPath(previousDict: dict, goal, board):
+    currNode = tuple(goal)
+    path = []
+    if board[goal[0]][goal[1]] == 0:
+        path = [currNode]
+        
+    while previousDict[currNode]:
+        currNode = previousDict[currNode]
+        if currNode == None:
+            break
+        if board[currNode[0]][currNode[1]] == 0:
+            path.append(currNode)
+
+    return tuple(path)
+
+
+# Board sizes allowed by the referee
+_SIZES = range(3, 16)
+
+# Fraction of cells holding a token in the generated positions
+_FILL = 0.3
+
+
+def random_board(n, rng, fill=_FILL):
+    """
+    Random board in the agent's representation (red = 1, blue = -1).
+    """
+    board = [[0 for _ in range(n)] for _ in range(n)]
+    cells = [(r, q) for r in range(n) for q in range(n)]
+    rng.shuffle(cells)
+    for i, (r, q) in enumerate(cells[:int(fill * n * n)]):
+        board[r][q] = 1 if i % 2 == 0 else -1
+    return board
+
+
+def time_calls(search, boards, n):
+    """
+    Mean seconds per call of search over boards, alternating colours.
+    """
+    start = time.perf_counter()
+    for i, board in enumerate(boards):
+        search(board, n, "red" if i % 2 == 0 else "blue")
+    return (time.perf_counter() - start) / len(boards)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = Random(30024)
+    print(f"{'n':>3} {'pairwise (ms)':>14} {'edge (ms)':>10} {'speedup':>8}")
+    for n in _SIZES:
+        boards = [random_board(n, rng) for _ in range(repeats)]
+        old = time_calls(pairwisePathSearch, boards, n)
+        new = time_calls(optimalPathSearch, boards, n)
+        print(f"{n:>3} {old * 1000:>14.3f} {new * 1000:>10.3f} "
+            f"{old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Measure MCTS playout throughput (random playouts with captures and a
+union-find winner check) from an empty board for every supported size.
+
+Usage: python -m benchmarks.playouts [seconds per size]
+"""
+
+import sys
+import time
+from random import Random
+
+from alcos_inc.mcts import playout
+
+# Board sizes allowed by the referee
+_SIZES = range(3, 16)
+
+
+def playouts_per_second(n, seconds, rng):
+    """
+    Number of complete playouts from an empty n x n board per CPU second.
+    """
+    count = 0
+    start = time.process_time()
+    while time.process_time() - start < seconds:
+        playout([0] * (n * n), n, 1, rng)
+        count += 1
+    return count / (time.process_time() - start)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    rng = Random(30024)
+    print(f"{'n':>3} {'playouts/s':>11}")
+    for n in _SIZES:
+        print(f"{n:>3} {playouts_per_second(n, seconds, rng):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from queue import PriorityQueue
+from heapq import heappush, heappop
 from unittest.mock import _patch_dict
 import random
 
@@ -46,15 +46,15 @@ def offsetToCube(node):
 # https://www.redblobgames.com/pathfinding/a-star/implementation.html#python-astar
 
 def lineHeuristicAlgo(board, start, goal, n):
-    pq = PriorityQueue()
-    pq.put((0,tuple(start)))
+    pq = []
+    heappush(pq, (0,tuple(start)))
     previousDict = {}
     currCost = {}
     previousDict[tuple(start)] = None
     currCost[tuple(start)] = 0
 
-    while not pq.empty():
-        currNode = pq.get()[1]
+    while pq:
+        currNode = heappop(pq)[1]
 
         if currNode == goal:
             break
@@ -66,7 +66,7 @@ def lineHeuristicAlgo(board, start, goal, n):
                 nextCost = currCost[currNode] + 1
             if nextNode not in currCost or nextCost < currCost[nextNode]:
                 currCost[nextNode] = nextCost
-                pq.put((distance(nextNode, goal) + currCost[nextNode], nextNode))
+                heappush(pq, (distance(nextNode, goal) + currCost[nextNode], nextNode))
                 previousDict[nextNode] = currNode
     return previousDict, currCost
 
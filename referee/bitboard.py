@@ -0,0 +1,232 @@
+"""
+Provide a bitboard implementation of the referee's Cachex board, offering
+the same interface as referee.board.Board.
+
+Each player's tokens are stored as a Python int bitmask. Cell (r, q) maps to
+bit r * (n + 2) + q, so every row is padded with two always-empty guard
+columns. Hex steps and diamond capture offsets (which move at most two
+columns) then become plain shifts that can never wrap onto the next row,
+and neighbour expansion and flood fill work on whole masks at once.
+"""
+
+from referee.board import _HEX_STEPS, _CAPTURE_PATTERNS, _TOKEN_MAP_OUT, \
+    _TOKEN_MAP_IN, _SWAP_PLAYER
+from referee.zobrist import cell_key, STEAL_KEY
+
+# Number of guard columns padding each row
+_GUARD = 2
+
+
+class BitBoard:
+    def __init__(self, n):
+        """
+        Initialise board of given size n.
+        """
+        self.n = n
+        self._width = n + _GUARD
+        # Bitmask per token type (index 0 is unused, 1 is red, 2 is blue)
+        self._stones = [0, 0, 0]
+        # Zobrist hash of the current state, kept up to date on every change
+        self._hash = 0
+
+        # Mask of all real (non-guard) cells
+        row = (1 << n) - 1
+        self._mask = 0
+        for r in range(n):
+            self._mask |= row << (r * self._width)
+
+        # Edge masks for detecting spanning groups, per player axis
+        self._edges = {
+            0: (row, row << ((n - 1) * self._width)),
+            1: (self._column(0), self._column(n - 1)),
+        }
+
+        # Hex steps and capture patterns as signed bit offsets
+        self._steps = [int(dr) * self._width + int(dq) for dr, dq in _HEX_STEPS]
+        self._patterns = [
+            [int(dr) * self._width + int(dq) for dr, dq in pattern]
+            for pattern in _CAPTURE_PATTERNS
+        ]
+
+    def __getitem__(self, coord):
+        """
+        Get the token at given board coord (r, q).
+        """
+        return _TOKEN_MAP_OUT[self._token_at(self._index(coord))]
+
+    def __setitem__(self, coord, token):
+        """
+        Set the token at given board coord (r, q).
+        """
+        index = self._index(coord)
+        bit = 1 << index
+        old_type = self._token_at(index)
+        if old_type:
+            self._stones[old_type] &= ~bit
+            self._hash ^= cell_key(coord, old_type)
+        if token is not None:
+            self._stones[_TOKEN_MAP_IN[token]] |= bit
+            self._hash ^= cell_key(coord, _TOKEN_MAP_IN[token])
+
+    def digest(self):
+        """
+        Digest of the board state (to help with counting repeated states).
+        This is the 64-bit Zobrist hash of the board.
+        """
+        return self._hash
+
+    def swap(self):
+        """
+        Swap player positions by mirroring the state along the major
+        board axis, swapping player token types at the same time.
+        """
+        stones = [0, 0, 0]
+        self._hash ^= STEAL_KEY
+        for token in (1, 2):
+            for index in self._indices(self._stones[token]):
+                r, q = divmod(index, self._width)
+                stones[_SWAP_PLAYER[token]] |= 1 << (q * self._width + r)
+                self._hash ^= cell_key((r, q), token)
+                self._hash ^= cell_key((q, r), _SWAP_PLAYER[token])
+        self._stones = stones
+
+    def place(self, token, coord):
+        """
+        Place a token on the board and apply captures if they exist.
+        Return coordinates of captured tokens.
+        """
+        self[coord] = token
+        return self._apply_captures(coord)
+
+    def connected_coords(self, start_coord):
+        """
+        Find connected coordinates from start_coord. This uses the token
+        value of the start_coord cell to determine which other cells are
+        connected (e.g., all will be the same value).
+        """
+        return [self._coord(index) for index in self._indices(
+            self._flood(start_coord))]
+
+    def spans(self, coord, axis):
+        """
+        True iff the group containing coord touches both board edges
+        along the given axis (0 for red's r axis, 1 for blue's q axis).
+        """
+        group = self._flood(coord)
+        low, high = self._edges[axis]
+        return bool(group & low) and bool(group & high)
+
+    def inside_bounds(self, coord):
+        """
+        True iff coord inside board bounds.
+        """
+        r, q = coord
+        return r >= 0 and r < self.n and q >= 0 and q < self.n
+
+    def is_occupied(self, coord):
+        """
+        True iff coord is occupied by a token (e.g., not None).
+        """
+        bit = 1 << self._index(coord)
+        return bool((self._stones[1] | self._stones[2]) & bit)
+
+    def _apply_captures(self, coord):
+        """
+        Check coord for diamond captures, and apply these to the board
+        if they exist. Returns a list of captured token coordinates.
+        """
+        index = self._index(coord)
+        opp_type = self._token_at(index)
+        if opp_type == 0:
+            return []
+        mine = self._stones[opp_type]
+        theirs = self._stones[_SWAP_PLAYER[opp_type]]
+        captured = 0
+
+        # Check each capture pattern intersecting with coord; guard columns
+        # and rows past the end are always empty, so only the low end of
+        # the board needs an explicit bounds check
+        for opposite, mid1, mid2 in self._patterns:
+            if index + min(opposite, mid1, mid2) < 0:
+                continue
+            if (mine >> (index + opposite)) & 1 and \
+                    (theirs >> (index + mid1)) & 1 and \
+                    (theirs >> (index + mid2)) & 1:
+                # Capturing has to be deferred in case of overlaps
+                captured |= (1 << (index + mid1)) | (1 << (index + mid2))
+
+        # Remove any captured tokens
+        mid_type = _SWAP_PLAYER[opp_type]
+        self._stones[mid_type] &= ~captured
+        coords = [self._coord(i) for i in self._indices(captured)]
+        for coord in coords:
+            self._hash ^= cell_key(coord, mid_type)
+        return coords
+
+    def _coord_neighbours(self, coord):
+        """
+        Returns (within-bounds) neighbouring coordinates for given coord.
+        """
+        neighbours = self._expand(1 << self._index(coord))
+        return [self._coord(index) for index in self._indices(neighbours)]
+
+    def _expand(self, region):
+        """
+        Mask of all in-bounds cells adjacent to any cell in region.
+        """
+        grown = 0
+        for step in self._steps:
+            grown |= region << step if step > 0 else region >> -step
+        return grown & self._mask
+
+    def _flood(self, start_coord):
+        """
+        Mask of the group of same-typed tokens containing start_coord.
+        """
+        index = self._index(start_coord)
+        token = self._token_at(index)
+        region = 1 << index
+        if token == 0:
+            return region
+        stones = self._stones[token]
+        while True:
+            grown = region | (self._expand(region) & stones)
+            if grown == region:
+                return region
+            region = grown
+
+    def _column(self, q):
+        """
+        Mask of all cells in column q.
+        """
+        column = 0
+        for r in range(self.n):
+            column |= 1 << (r * self._width + q)
+        return column
+
+    def _token_at(self, index):
+        """
+        Internal token type (0, 1 or 2) stored at bit index.
+        """
+        if (self._stones[1] >> index) & 1:
+            return 1
+        if (self._stones[2] >> index) & 1:
+            return 2
+        return 0
+
+    def _index(self, coord):
+        r, q = coord
+        return int(r) * self._width + int(q)
+
+    def _coord(self, index):
+        return divmod(index, self._width)
+
+    @staticmethod
+    def _indices(mask):
+        """
+        Yield the index of every set bit in mask, lowest first.
+        """
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
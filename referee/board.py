@@ -12,31 +12,15 @@ you should think carefully about how to design your own data structures for
 representing the state of a game, with respect to your chosen strategy. 
 """
 
-from queue import Queue
-from numpy import zeros, array, roll, vectorize
-
-# Utility function to add two coord tuples
-_ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
-
-# Neighbour hex steps in clockwise order
-_HEX_STEPS = array([(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)], 
-    dtype="i,i")
-
-# Pre-compute diamond capture patterns - each capture pattern is a 
-# list of offset steps:
-# [opposite offset, neighbour 1 offset, neighbour 2 offset]
-#
-# Note that the "opposite cell" offset is actually the sum of
-# the two neighbouring cell offsets (for a given diamond formation)
-#
-# Formed diamond patterns are either "longways", in which case the
-# neighbours are adjacent to each other (roll 1), OR "sideways", in
-# which case the neighbours are spaced apart (roll 2). This means
-# for a given cell, it is part of 6 + 6 possible diamonds.
-_CAPTURE_PATTERNS = [[_ADD(n1, n2), n1, n2] 
-    for n1, n2 in 
-        list(zip(_HEX_STEPS, roll(_HEX_STEPS, 1))) + 
-        list(zip(_HEX_STEPS, roll(_HEX_STEPS, 2)))]
+from collections import deque
+from functools import lru_cache
+from numpy import zeros, vectorize, transpose, nonzero
+
+from referee.zobrist import cell_key, STEAL_KEY
+# Hex steps and diamond capture patterns, and the per-size tables built
+# from them (neighbours, in-bounds captures, edges)
+from referee.geometry import _ADD, _HEX_STEPS, _CAPTURE_PATTERNS, \
+    coord_neighbours, capture_table, edge_cells
 
 # Maps between player string and internal token type
 _TOKEN_MAP_OUT = { 0: None, 1: "red", 2: "blue" }
@@ -45,6 +29,25 @@ _TOKEN_MAP_IN = {v: k for k, v in _TOKEN_MAP_OUT.items()}
 # Map between player token types
 _SWAP_PLAYER = { 0: 0, 1: 2, 2: 1 }
 
+# Bit flags for the board edges a group of tokens touches: the low and high
+# edge along the r axis (0) and q axis (1)
+_EDGE_FLAGS = [(1, 2), (4, 8)]
+_SPAN_FLAGS = [low | high for low, high in _EDGE_FLAGS]
+
+
+@lru_cache(maxsize=None)
+def _cell_edge_flags(n):
+    """
+    The board edges each node is on, as _EDGE_FLAGS bits (red's start and
+    goal edges are on the r axis, blue's on the q axis).
+    """
+    flags = [0] * (n * n)
+    for axis, player in enumerate(("red", "blue")):
+        for edge, flag in zip(edge_cells(n)[player], _EDGE_FLAGS[axis]):
+            for r, q in edge:
+                flags[r * n + q] |= flag
+    return tuple(flags)
+
 class Board:
     def __init__(self, n):
         """
@@ -52,6 +55,15 @@ class Board:
         """
         self.n = n
         self._data = zeros((n, n), dtype=int)
+        # Zobrist hash of the current state, kept up to date on every change
+        self._hash = 0
+
+        # In-bounds neighbours of every cell, as plain int coords, and the
+        # board edges each cell is on (shared by all boards of this size)
+        self._neighbours = coord_neighbours(n)
+        self._edge_flags = _cell_edge_flags(n)
+        # Groups of same-typed tokens, kept up to date on every change
+        self._reset_groups()
 
     def __getitem__(self, coord):
         """
@@ -63,14 +75,26 @@ class Board:
         """
         Set the token at given board coord (r, q).
         """
-        self._data[coord] = _TOKEN_MAP_IN[token]
+        old_type = self._data[coord]
+        new_type = _TOKEN_MAP_IN[token]
+        if old_type:
+            self._hash ^= cell_key(coord, old_type)
+        if new_type:
+            self._hash ^= cell_key(coord, new_type)
+        self._data[coord] = new_type
+        if old_type != new_type:
+            coord = (int(coord[0]), int(coord[1]))
+            if old_type:
+                self._disconnect(coord)
+            if new_type:
+                self._connect(coord, new_type)
 
     def digest(self):
         """
         Digest of the board state (to help with counting repeated states).
-        Could use a hash function, but not really necessary for our purposes.
+        This is the 64-bit Zobrist hash of the board.
         """
-        return self._data.tobytes()
+        return self._hash
 
     def swap(self):
         """
@@ -81,6 +105,20 @@ class Board:
         swap_player_tokens = vectorize(lambda t: _SWAP_PLAYER[t])
         self._data = swap_player_tokens(self._data.transpose())
 
+        # Only the tokens themselves change their keys
+        self._hash ^= STEAL_KEY
+        for coord in transpose(nonzero(self._data)):
+            coord = tuple(coord)
+            token_type = self._data[coord]
+            self._hash ^= cell_key(coord, token_type)
+            self._hash ^= cell_key(coord[::-1], _SWAP_PLAYER[token_type])
+
+        # Every group changes type and axis, so rebuild them from scratch
+        self._reset_groups()
+        for coord in transpose(nonzero(self._data)):
+            coord = (int(coord[0]), int(coord[1]))
+            self._connect(coord, self._data[coord])
+
     def place(self, token, coord):
         """
         Place a token on the board and apply captures if they exist.
@@ -98,20 +136,35 @@ class Board:
         # Get search token type
         token_type = self._data[start_coord]
 
-        # Use bfs from start coordinate
-        reachable = set()
-        queue = Queue(0)
-        queue.put(start_coord)
+        # Groups of tokens are already known
+        if token_type:
+            root = self._find(self._node(start_coord))
+            return [divmod(node, self.n) for node in self._members[root]]
 
-        while not queue.empty():
-            curr_coord = queue.get()
-            reachable.add(curr_coord)
-            for coord in self._coord_neighbours(curr_coord):
+        # Use bfs from start coordinate for empty regions
+        start_coord = (int(start_coord[0]), int(start_coord[1]))
+        reachable = {start_coord}
+        queue = deque([start_coord])
+
+        while queue:
+            curr_coord = queue.popleft()
+            for coord in self._neighbours[curr_coord]:
                 if coord not in reachable and self._data[coord] == token_type:
-                    queue.put(coord)
+                    reachable.add(coord)
+                    queue.append(coord)
 
         return list(reachable)
 
+    def spans(self, coord, axis):
+        """
+        True iff the group containing coord touches both board edges
+        along the given axis (0 for red's r axis, 1 for blue's q axis).
+        """
+        if not self._data[coord]:
+            return False
+        edges = self._edges[self._find(self._node(coord))]
+        return edges & _SPAN_FLAGS[axis] == _SPAN_FLAGS[axis]
+
     def inside_bounds(self, coord):
         """
         True iff coord inside board bounds.
@@ -134,16 +187,14 @@ class Board:
         mid_type = _SWAP_PLAYER[opp_type]
         captured = set()
 
-        # Check each capture pattern intersecting with coord
-        for pattern in _CAPTURE_PATTERNS:
-            coords = [_ADD(coord, s) for s in pattern]
-            # No point checking if any coord is outside the board!
-            if all(map(self.inside_bounds, coords)):
-                tokens = [self._data[coord] for coord in coords]
-                if tokens == [opp_type, mid_type, mid_type]:
-                    # Capturing has to be deferred in case of overlaps
-                    # Both mid cell tokens should be captured
-                    captured.update(coords[1:])
+        # Check each capture pattern intersecting with coord (only those
+        # wholly inside the board are in the table)
+        for coords in capture_table(self.n)[self._node(coord)]:
+            tokens = [self._data[coord] for coord in coords]
+            if tokens == [opp_type, mid_type, mid_type]:
+                # Capturing has to be deferred in case of overlaps
+                # Both mid cell tokens should be captured
+                captured.update(coords[1:])
 
         # Remove any captured tokens
         for coord in captured:
@@ -157,3 +208,71 @@ class Board:
         """
         return [_ADD(coord, step) for step in _HEX_STEPS \
             if self.inside_bounds(_ADD(coord, step))]
+
+    def _reset_groups(self):
+        """
+        Reset the union-find structure over all cells (node r * n + q),
+        so that every cell is in a group on its own.
+        """
+        size = self.n * self.n
+        self._parent = list(range(size))
+        # Nodes in each group, and the board edges (_EDGE_FLAGS) the group
+        # touches, both stored at the group's root only
+        self._members = [[node] for node in range(size)]
+        self._edges = [0] * size
+
+    def _connect(self, coord, token_type):
+        """
+        Join the (newly set) token at coord to the groups of its same-typed
+        neighbours, recording any board edges it is on.
+        """
+        node = self._node(coord)
+        self._edges[self._find(node)] |= self._edge_flags[node]
+        for neighbour in self._neighbours[coord]:
+            if self._data[neighbour] == token_type:
+                self._union(node, self._node(neighbour))
+
+    def _disconnect(self, coord):
+        """
+        Remove the (just cleared) cell at coord from its group. Removing a
+        token can split its group, so only that group is taken apart and
+        its remaining tokens joined up again; all other groups are kept.
+        """
+        node = self._node(coord)
+        members = self._members[self._find(node)]
+        for member in members:
+            self._parent[member] = member
+            self._members[member] = [member]
+            self._edges[member] = 0
+        for member in members:
+            if member != node:
+                other = divmod(member, self.n)
+                self._connect(other, self._data[other])
+
+    def _find(self, node):
+        """
+        Root node of the group containing node (with path halving).
+        """
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, a, b):
+        """
+        Merge the groups containing nodes a and b (smaller into larger).
+        """
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        self._parent[b] = a
+        self._members[a].extend(self._members[b])
+        self._members[b] = None
+        self._edges[a] |= self._edges[b]
+
+    def _node(self, coord):
+        r, q = coord
+        return int(r) * self.n + int(q)
@@ -12,7 +12,7 @@ import collections
 from itertools import islice
 
 from referee.board import Board
-from referee.log import comment
+from referee.log import comment, enabled
 
 # Game-specific constants for use in other modules:
 
@@ -36,6 +36,8 @@ def play(
     log_filename=None,
     log_file=None,
     out_function=comment,
+    board_cls=Board,
+    recorder=None,
 ):
     """
     Coordinate a game, return a string describing the result.
@@ -55,6 +57,9 @@ def play(
     * log_filename   -- If not None, log all game actions to this path.
     * out_function   -- Use this function (instead of default 'comment')
                         for all output messages.
+    * board_cls      -- Board implementation to play on (Board or BitBoard).
+    * recorder       -- If not None, a referee.record.GameRecorder to record
+                        the game in the binary format.
     """
     # Configure behaviour of this function depending on parameters:
     if delay > 0:
@@ -94,7 +99,13 @@ def play(
 
     # Set up a new game and initialise the players (constructing the
     # Player classes including running their .__init__() methods).
-    game = Game(n, log_filename=log_filename, log_file=log_file)
+    game = Game(
+        n,
+        log_filename=log_filename,
+        log_file=log_file,
+        board_cls=board_cls,
+        recorder=recorder,
+    )
     comment("initialising players", depth=-1)
     for player, colour in zip(players, COLOURS):
         # NOTE: `player` here is actually a player wrapper. Your program
@@ -109,7 +120,8 @@ def play(
     # Repeat the following until the game ends
     turn = 1
     while not game.over():
-        comment(f"Turn {turn}", depth=-1)
+        if enabled():
+            comment(f"Turn {turn}", depth=-1)
         curr_player = players[(turn - 1) % 2]
 
         # Ask current player for their next action (calling .action() method)
@@ -170,9 +182,10 @@ class Game:
     are __init__, update, over, end, and __str__.
     """
 
-    def __init__(self, n, log_filename=None, log_file=None):
+    def __init__(self, n, log_filename=None, log_file=None, board_cls=Board,
+            recorder=None):
         # Initialise game board
-        self.board = Board(n)
+        self.board = board_cls(n)
 
         # Also keep track of some other state variables for win/draw
         # detection (number of turns, state history)
@@ -197,6 +210,15 @@ class Game:
             self.logger = logging.getLogger()  # logger with no handlers
             self.handler = None
 
+        # Log the board size first, so that the log can be replayed
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"board size: {n}")
+
+        # Binary game record (see referee.record), if wanted
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.start(n)
+
     def update(self, player, action):
         """
         Submit an action to the game for validation and application.
@@ -241,13 +263,20 @@ class Game:
             # This should never happen, but good to be defensive
             raise self._illegal_action(action, f"Action not handled.")
 
+        # Record the action (if recording is enabled)
+        if self.recorder is not None:
+            self.recorder.move(action)
+
         # End turn and check for game end conditions
         self._turn_detect_end(player, action)
         
         # Log the action (if logging is enabled)
-        self.logger.info(
-            f"turn {self.nturns}: {player}: {_FORMAT_ACTION(action)}"
-        )
+        if self.logger.isEnabledFor(logging.INFO):
+            message = f"turn {self.nturns}: {player}: {_FORMAT_ACTION(action)}"
+            if atype == _ACTION_PLACE and self.last_captures:
+                captures = [(int(r), int(q)) for r, q in self.last_captures]
+                message += f" capturing {sorted(captures)}"
+            self.logger.info(message)
 
         return (atype, *aargs) # action is sanitised at this point
 
@@ -319,15 +348,13 @@ class Game:
         # Game end conditions
 
         # Condition 1: player forms a continuous path spanning board (win).
-        # check reachable coords from just-placed token to detect winning path
+        # check the group of the just-placed token for a winning path
         # NOTE: No point checking this while total turns is less than 2n - 1
         if self.nturns >= (self.board.n * 2) - 1:
             _, r, q = action
-            reachable = self.board.connected_coords((r, q))
-            axis_vals = [coord[_PLAYER_AXIS[player]] for coord in reachable]
-            if min(axis_vals) == 0 and max(axis_vals) == self.board.n - 1:
+            if self.board.spans((r, q), _PLAYER_AXIS[player]):
                 self.result = "winner: " + player
-                self.result_cluster = set(reachable)
+                self.result_cluster = set(self.board.connected_coords((r, q)))
                 return
 
         # Condition 2: the same state has occurred too many times (draw)
@@ -359,6 +386,8 @@ class Game:
         """
         if self.result:
             self.logger.info(self.result)
+            if self.recorder is not None:
+                self.recorder.end(self.result)
             self.close()
         return self.result
     
@@ -0,0 +1,112 @@
+"""
+Provide board geometry tables for every board size, built once per size and
+cached, so that boards (and players) can look up neighbours, capture
+patterns, edges and distances instead of recomputing them in hot loops.
+
+Tables are indexed by flat cell (node r * n + q) and hold (r, q) coords,
+except for neighbour_table (flat nodes) and distance_table (distances).
+"""
+
+from functools import lru_cache
+
+# Board sizes the referee allows
+MIN_N = 3
+MAX_N = 15
+
+# Utility function to add two coord tuples
+_ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
+
+# Neighbour hex steps in clockwise order
+_HEX_STEPS = ((1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1))
+
+# Pre-compute diamond capture patterns - each capture pattern is a 
+# list of offset steps:
+# [opposite offset, neighbour 1 offset, neighbour 2 offset]
+#
+# Note that the "opposite cell" offset is actually the sum of
+# the two neighbouring cell offsets (for a given diamond formation)
+#
+# Formed diamond patterns are either "longways", in which case the
+# neighbours are adjacent to each other (roll 1), OR "sideways", in
+# which case the neighbours are spaced apart (roll 2). This means
+# for a given cell, it is part of 6 + 6 possible diamonds.
+_CAPTURE_PATTERNS = [[_ADD(n1, n2), n1, n2]
+    for n1, n2 in
+        list(zip(_HEX_STEPS, _HEX_STEPS[-1:] + _HEX_STEPS[:-1])) +
+        list(zip(_HEX_STEPS, _HEX_STEPS[-2:] + _HEX_STEPS[:-2]))]
+
+
+def _inside(coord, n):
+    r, q = coord
+    return 0 <= r < n and 0 <= q < n
+
+
+@lru_cache(maxsize=None)
+def coord_neighbours(n):
+    """
+    Map from every coord (r, q) to the tuple of its in-bounds neighbours.
+    """
+    return {
+        (r, q): tuple(_ADD((r, q), step) for step in _HEX_STEPS
+            if _inside(_ADD((r, q), step), n))
+        for r in range(n) for q in range(n)
+    }
+
+
+@lru_cache(maxsize=None)
+def neighbour_table(n):
+    """
+    For every flat node, the flat nodes of its in-bounds neighbours.
+    """
+    neighbours = coord_neighbours(n)
+    return tuple(
+        tuple(r2 * n + q2 for r2, q2 in neighbours[(r, q)])
+        for r in range(n) for q in range(n)
+    )
+
+
+@lru_cache(maxsize=None)
+def capture_table(n):
+    """
+    For every flat node, the diamond capture patterns through it that lie
+    wholly inside the board, as (opposite, neighbour 1, neighbour 2) coord
+    triples.
+    """
+    table = []
+    for r in range(n):
+        for q in range(n):
+            triples = []
+            for pattern in _CAPTURE_PATTERNS:
+                coords = tuple(_ADD((r, q), step) for step in pattern)
+                if all(_inside(coord, n) for coord in coords):
+                    triples.append(coords)
+            table.append(tuple(triples))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def edge_cells(n):
+    """
+    The (start edge, goal edge) coords of each player, as frozensets: red
+    joins the r = 0 and r = n - 1 edges, blue the q = 0 and q = n - 1 ones.
+    """
+    cells = range(n)
+    return {
+        "red": (frozenset((0, i) for i in cells),
+            frozenset((n - 1, i) for i in cells)),
+        "blue": (frozenset((i, 0) for i in cells),
+            frozenset((i, n - 1) for i in cells)),
+    }
+
+
+@lru_cache(maxsize=None)
+def distance_table(n):
+    """
+    All-pairs hex distances: distance_table(n)[a][b] is the number of steps
+    between flat nodes a and b on an empty board (one bytes row per node).
+    """
+    return tuple(
+        bytes((abs(r2 - r1) + abs(q2 - q1) + abs(r2 - r1 + q2 - q1)) // 2
+            for r2 in range(n) for q2 in range(n))
+        for r1 in range(n) for q1 in range(n)
+    )
@@ -0,0 +1,514 @@
+"""
+Provide a wrapper that runs a Player class in its own child process, as an
+alternative to PlayerWrapper (which imports both players into the referee's
+process, so that they share its memory and interpreter).
+
+The referee and the child talk over a socket pair, sending small pickled
+tuples with multiprocessing.connection:
+
+    referee -> player:  ("load", sys.path, player_loc, time_limit,
+                            space_limit, measure_space)
+                        ("init", colour, n)
+                        ("action", profile)
+                        ("turn", player, action)
+                        ("stop",)
+    player -> referee:  ("ok", result, cpu_time, curr_usage, peak_usage)
+                        ("error", kind, message)
+
+Starting a fresh interpreter and importing the player package (and NumPy)
+costs a lot more than a short game. A PlayerServer imports a player's
+package once and then forks an already warm child for every game that
+connects to it; such a child is sent ("fork", time_limit, space_limit,
+measure_space) instead of "load", and each game still gets a freshly constructed Player.
+
+With a MoveProfiler (see referee.profiling), profile is the (path, mode,
+interval) with which the child profiles that action itself (None otherwise).
+
+Each call's CPU time is measured inside the child with process_time() (plus
+the increase in the player's child_time(), if it starts processes itself), and
+its memory usage is read from the child's own /proc/self/status, so each
+player is accounted for exactly and never charged for the other's memory.
+The child also enforces its limits on itself with resource.setrlimit
+(RLIMIT_CPU and RLIMIT_AS), and the referee keeps a watchdog on each call in
+case the child dies or stops responding.
+"""
+
+import gc
+import os
+import sys
+import time
+import socket
+import signal
+import threading
+import traceback
+import subprocess
+from math import ceil
+from multiprocessing.connection import Connection, Client, Listener
+
+from referee.log import comment, enabled
+from referee.player import _CountdownTimer, _MemoryWatcher, _load_player_class
+from referee.player import _child_timer
+from referee.player import GameMetrics
+from referee.player import ResourceLimitException, _get_space_usage
+from referee.profiling import profile_call
+
+# How often (seconds) the watchdog checks on a child while waiting for it
+_POLL_INTERVAL = 0.1
+
+# A call is abandoned after this many times the player's remaining CPU time
+# (plus grace seconds) has passed on the wall clock
+_WATCHDOG_FACTOR = 3
+_WATCHDOG_GRACE = 5.0
+
+# Extra CPU seconds allowed by RLIMIT_CPU beyond the time limit; the referee
+# reports the exact overrun, the rlimit only stops runaway players
+_RLIMIT_CPU_SLACK = 1
+
+# Signals with which the kernel stops a process that ran out of CPU time
+_TIME_SIGNALS = {signal.SIGXCPU, signal.SIGKILL}
+
+
+class PlayerProcessError(Exception):
+    """For when a player's own process fails (e.g. the player raised)."""
+
+
+class IsolatedPlayerWrapper:
+    """
+    Wraps a real Player class running in a child process, providing the
+    same interface as PlayerWrapper:
+    * Wrapper constructor starts the process, which imports the Player
+        class by name.
+    * `.init()`, `.action()` and `.turn()` are forwarded to the process.
+    * `.close()` stops the process.
+    Each call is timed and measured by the child itself, and both limits
+    are also enforced by the operating system inside the child.
+    With a PlayerServer for the same player_loc, the child is forked from
+    that server instead of started (and importing the player) from scratch.
+    """
+
+    def __init__(self, name, player_loc, time_limit=None, space_limit=None,
+            server=None, profiler=None):
+        self.name = name
+        self.profiler = profiler
+
+        # resource accounting, charged with the child's own measurements
+        self.timer = _CountdownTimer(time_limit, self.name)
+        self.space = _MemoryWatcher(space_limit, self.name)
+        self.metrics = GameMetrics()
+
+        # start the child (which imports the Player class) or fork one
+        player_pkg, player_cls = player_loc
+        self.player_cls = player_cls
+        start = time.perf_counter()
+        # space is only read if it is limited or will be shown
+        measure = bool(space_limit) or enabled()
+        if server is None and enabled():
+            comment(
+                f"importing {self.name}'s player class '{player_cls}' "
+                f"from package '{player_pkg}' in a new process"
+            )
+        elif enabled():
+            comment(
+                f"forking {self.name}'s player class '{player_cls}' "
+                f"from package '{player_pkg}' from its server"
+            )
+        if server is None:
+            parent, child = socket.socketpair()
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "referee.isolated", str(child.fileno())],
+                pass_fds=(child.fileno(),),
+                env=_child_env(),
+            )
+            child.close()
+            self._connection = Connection(parent.detach())
+            message = ("load", sys.path, player_loc, time_limit, space_limit,
+                measure)
+        else:
+            self._process = None
+            self._connection = Client(server.address, authkey=server.authkey)
+            message = ("fork", time_limit, space_limit, measure)
+        self.pid = self._call(*message)
+
+        # wall-clock time taken to get the player process ready
+        self.startup = time.perf_counter() - start
+        if enabled():
+            comment(f"process {self.pid} ready in {self.startup:.3f}s",
+                depth=1)
+
+    def init(self, colour, n):
+        self.colour = colour
+        self.name += f" ({colour})"
+        if enabled():
+            comment(
+                f"initialising {self.colour} player as a {self.player_cls} "
+                f"(process {self.pid})"
+            )
+        self._call("init", colour, n)
+        self._report()
+
+    def action(self):
+        if enabled():
+            comment(f"asking {self.name} for next action...")
+        target = None
+        if self.profiler is not None:
+            target = self.profiler.target(self.colour)
+        action = self._call("action", target)
+        if enabled():
+            comment(f"{self.name} returned action: {action!r}", depth=1)
+        self._report()
+        return action
+
+    def turn(self, player, action):
+        if enabled():
+            comment(f"updating {self.name} with actions...")
+        self._call("turn", player, action)
+        self._report()
+
+    def close(self):
+        """
+        Stop the child process.
+        """
+        if self._connection.closed:
+            return
+        try:
+            self._connection.send(("stop",))
+        except OSError:
+            pass
+        if self._process is not None and self._process.poll() is None:
+            try:
+                self._process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self._kill()
+        self._connection.close()
+
+    def _report(self):
+        """
+        Record the last call's usage, and comment on it if visible.
+        """
+        self.metrics.record(self.timer.elapsed, self.space.peak)
+        if enabled():
+            comment(self.timer.status(), depth=1)
+            comment(self.space.status(), depth=1)
+
+    def _call(self, *message):
+        """
+        Send a message to the child, wait for its reply and charge the
+        reported resource usage. Returns the call's result.
+        """
+        try:
+            self._connection.send(message)
+            self._wait()
+            reply = self._connection.recv()
+        except (EOFError, OSError):
+            raise self._died()
+
+        if reply[0] == "error":
+            _, kind, text = reply
+            self.close()
+            if kind == "space":
+                raise ResourceLimitException(
+                    f"{self.name} exceeded available space"
+                )
+            if kind == "time":
+                raise ResourceLimitException(
+                    f"{self.name} exceeded available time"
+                )
+            raise PlayerProcessError(f"{self.name} failed:\n{text}")
+
+        _, result, cpu_time, curr_usage, peak_usage = reply
+        self.timer.charge(cpu_time)
+        if curr_usage is not None:
+            self.space.record(curr_usage, peak_usage)
+        return result
+
+    def _wait(self):
+        """
+        Watchdog: wait until the child has replied, checking that it is
+        still alive and (if time is limited) not stuck past its budget.
+        """
+        deadline = None
+        if self.timer.limit:
+            remaining = max(0, self.timer.limit - self.timer.clock)
+            deadline = time.monotonic() + \
+                _WATCHDOG_FACTOR * remaining + _WATCHDOG_GRACE
+        # (a child that exits closes its end, which also ends the poll)
+        while not self._connection.poll(_POLL_INTERVAL):
+            if self._process is not None and self._process.poll() is not None:
+                raise self._died()
+            if deadline is not None and time.monotonic() > deadline:
+                self._kill()
+                self._connection.close()
+                raise ResourceLimitException(
+                    f"{self.name} exceeded available time (stopped "
+                    "responding)"
+                )
+
+    def _kill(self):
+        """
+        Stop the child process immediately.
+        """
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+        elif getattr(self, "pid", None) is not None:
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def _died(self):
+        """
+        Exception describing why the child exited without replying.
+        """
+        self._connection.close()
+        if self._process is None:
+            # a forked child's exit status goes to its server
+            return PlayerProcessError(
+                f"{self.name}'s process exited unexpectedly"
+            )
+        returncode = self._process.wait()
+        if -returncode in _TIME_SIGNALS:
+            return ResourceLimitException(
+                f"{self.name} exceeded available time"
+            )
+        return PlayerProcessError(
+            f"{self.name}'s process exited unexpectedly (code {returncode})"
+        )
+
+
+class PlayerServer:
+    """
+    Fork server for one player package: a process that imports the Player
+    class once, then forks a warm child process for each game.
+    Pass it to IsolatedPlayerWrapper as `server`; a server may be shared by
+    any number of games (it can be pickled, e.g. to pool workers, but only
+    the original object can close it).
+    """
+
+    def __init__(self, player_loc):
+        self.player_loc = player_loc
+        self.authkey = os.urandom(32)
+        parent, child = socket.socketpair()
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "referee.isolated", "--server",
+                str(child.fileno())],
+            pass_fds=(child.fileno(),),
+            env=_child_env(),
+        )
+        child.close()
+        self._connection = Connection(parent.detach())
+        self._connection.send(("serve", sys.path, player_loc, self.authkey))
+        try:
+            reply = self._connection.recv()
+        except EOFError:
+            reply = ("error", "exception", "server exited unexpectedly")
+        if reply[0] == "error":
+            self.close()
+            raise PlayerProcessError(
+                f"failed to start server for {player_loc}:\n{reply[2]}"
+            )
+        # address to connect to, and time taken importing the Player class
+        _, self.address, self.import_time, _, _ = reply
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_process"] = state["_connection"] = None
+        return state
+
+    def close(self):
+        """
+        Stop the server (children already forked keep running).
+        """
+        if self._process is None:
+            return
+        self._connection.close()
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+
+def _child_env():
+    """
+    Environment for a child, able to import the referee package itself.
+    """
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = env.get("PYTHONPATH")
+    env["PYTHONPATH"] = root + (os.pathsep + path if path else "")
+    return env
+
+
+# CHILD PROCESS
+
+
+def _serve(connection):
+    """
+    Child entry point: load the Player class, then play.
+    """
+    _, path, (player_pkg, player_cls), time_limit, space_limit, measure = \
+        connection.recv()
+    sys.path[:] = path
+    try:
+        Player = _load_player_class(player_pkg, player_cls)
+    except Exception:
+        connection.send(("error", "exception", traceback.format_exc()))
+        return
+    _play(connection, Player, time_limit, space_limit, measure)
+
+
+def _serve_forks(control):
+    """
+    Fork server entry point: load the Player class, then fork a child to
+    play for every connection, until the control connection is closed.
+    """
+    _, path, (player_pkg, player_cls), authkey = control.recv()
+    sys.path[:] = path
+    start = time.perf_counter()
+    try:
+        Player = _load_player_class(player_pkg, player_cls)
+    except Exception:
+        control.send(("error", "exception", traceback.format_exc()))
+        return
+    import_time = time.perf_counter() - start
+    listener = Listener(family="AF_UNIX", authkey=authkey)
+    control.send(("ok", listener.address, import_time, None, None))
+
+    # children are never waited for, so have the kernel reap them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    def watch_control():
+        try:
+            control.recv()
+        except (EOFError, OSError):
+            pass
+        os._exit(0)
+
+    threading.Thread(target=watch_control, daemon=True).start()
+
+    while True:
+        try:
+            connection = listener.accept()
+        except Exception:
+            # e.g. a client that failed authentication
+            continue
+        if os.fork() == 0:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            listener.close()
+            try:
+                _, time_limit, space_limit, measure = connection.recv()
+                _play(connection, Player, time_limit, space_limit, measure)
+            finally:
+                os._exit(0)
+        connection.close()
+
+
+def _play(connection, Player, time_limit, space_limit, measure):
+    """
+    Child loop: run each call it is sent and reply with the result and the
+    call's resource usage (space only if measure is set).
+    """
+    # measure the interpreter and imports first, to subtract them later
+    base_usage = None
+    if measure:
+        try:
+            base_usage, _ = _get_space_usage()
+        except Exception:
+            pass
+    _set_limits(time_limit, space_limit, base_usage, connection)
+    connection.send(("ok", os.getpid(), 0.0, None, None))
+
+    player = None
+    try:
+        while True:
+            try:
+                name, *args = connection.recv()
+            except EOFError:
+                return
+            if name == "stop":
+                return
+
+            # clean up memory off the clock (if it matters)
+            if time_limit or measure:
+                gc.collect()
+            children = _child_timer(player)
+            children_start = children() if children is not None else 0.0
+            start = time.process_time()
+            try:
+                if name == "init":
+                    player, result = Player(*args), None
+                elif name == "action" and args[0] is not None:
+                    result = profile_call(player.action, *args[0])
+                elif name == "action":
+                    result = player.action()
+                else:
+                    result = player.turn(*args)
+            except MemoryError:
+                connection.send(("error", "space", "MemoryError"))
+                return
+            except Exception:
+                connection.send(("error", "exception", traceback.format_exc()))
+                return
+            cpu_time = time.process_time() - start
+            if children is not None:
+                cpu_time += children() - children_start
+
+            curr_usage = peak_usage = None
+            if base_usage is not None:
+                curr_usage, peak_usage = _get_space_usage()
+                curr_usage -= base_usage
+                peak_usage -= base_usage
+            connection.send(("ok", result, cpu_time, curr_usage, peak_usage))
+    finally:
+        # let the player release what it holds (e.g. worker processes)
+        # before the process exits, possibly with os._exit
+        _close(player)
+
+
+def _close(player):
+    """
+    Call the player's own close() method, if it has one (errors are
+    ignored: the game is already over).
+    """
+    close = getattr(player, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def _set_limits(time_limit, space_limit, base_usage, connection):
+    """
+    Have the operating system stop this process if it uses more than
+    time_limit seconds of CPU time (from now) or grows space_limit MB past
+    base_usage MB of virtual memory. Unlimited (0 or None) limits and
+    platforms without the resource module are skipped.
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+    if time_limit:
+        cpu = ceil(time.process_time() + time_limit) + _RLIMIT_CPU_SLACK
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+
+        # tell the referee why we are stopping (its own watch cannot tell
+        # for forked children)
+        def out_of_time(signum, frame):
+            connection.send(("error", "time", "SIGXCPU"))
+            os._exit(1)
+
+        signal.signal(signal.SIGXCPU, out_of_time)
+    if space_limit and base_usage is not None:
+        space = int((base_usage + space_limit) * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (space, space))
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "--server":
+        _serve_forks(Connection(int(sys.argv[2])))
+    else:
+        _serve(Connection(int(sys.argv[1])))
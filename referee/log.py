@@ -48,6 +48,13 @@ class StarLog:
         else:
             self.clear = ""
 
+    def enabled(self, level=1):
+        """
+        True iff messages at this level would be printed. Callers can check
+        this before building expensive messages.
+        """
+        return level <= self.level
+
     def log(self, *args, level=None, depth=0, clear=False, **kwargs):
         """
         Log a message if warranted by this log's verbosity level setting.
@@ -125,6 +132,13 @@ def log(*args, **kwargs):
     _DEFAULT_STARLOG.log(*args, **kwargs)
 
 
+def enabled(level=1):
+    """
+    See StarLog.enabled.
+    """
+    return _DEFAULT_STARLOG.enabled(level)
+
+
 def print(*args, **kwargs):
     """Shortcut to log at level 0 (always)."""
     log(*args, level=0, **kwargs)
@@ -5,9 +5,14 @@ between them.
 
 from referee.log import config, print, comment, _print
 from referee.game import play, IllegalActionException
+from referee.board import Board
+from referee.bitboard import BitBoard
 from referee.player import PlayerWrapper
 from referee.player import ResourceLimitException, set_space_line
-from referee.options import get_options
+from referee.isolated import IsolatedPlayerWrapper
+from referee.record import GameRecorder, RecordWriter
+from referee.profiling import MoveProfiler
+from referee.options import get_options, package_spec
 
 
 def main():
@@ -22,25 +27,53 @@ def main():
     comment("(any other lines of output must be from your Player class).")
     comment()
 
+    # Each player is imported here, or in a process of its own
+    wrapper_cls = IsolatedPlayerWrapper if options.isolate else PlayerWrapper
+    players = []
+    writer = None
+
+    # Profile every action, if requested (one profiler numbers both
+    # players' moves)
+    profiler = None
+    if options.profile is not None:
+        profiler = MoveProfiler(options.profile, options.profile_mode)
+        comment(f"profiling every action into {options.profile}/")
+
     try:
         # Import player classes
-        p1 = PlayerWrapper(
+        p1 = wrapper_cls(
             "player 1",
             options.player1_loc,
             time_limit=options.time,
             space_limit=options.space,
+            profiler=profiler,
         )
-        p2 = PlayerWrapper(
+        players.append(p1)
+        p2 = wrapper_cls(
             "player 2",
             options.player2_loc,
             time_limit=options.time,
             space_limit=options.space,
+            profiler=profiler,
         )
+        players.append(p2)
 
         # We'll start measuring space usage from now, after all
         # library imports should be finished:
         set_space_line()
 
+        # Record the game in binary too, if requested
+        recorder = None
+        if options.record is not None:
+            writer = RecordWriter(options.record)
+            recorder = GameRecorder(
+                writer,
+                players=(
+                    package_spec(options.player1_loc),
+                    package_spec(options.player2_loc),
+                ),
+            )
+
         # Play the game!
         result = play(
             [p1, p2],
@@ -51,6 +84,8 @@ def main():
             use_colour=options.use_colour,
             use_unicode=options.use_unicode,
             log_filename=options.logfile,
+            board_cls=BitBoard if options.bitboard else Board,
+            recorder=recorder,
         )
         # Display the final result of the game to the user.
         comment("game over!", depth=-1)
@@ -71,3 +106,8 @@ def main():
         comment(e)
     # If it's another kind of error then it might be coming from the player
     # itself? Then, a traceback will be more helpful. Don't handle this.
+    finally:
+        for player in players:
+            player.close()
+        if writer is not None:
+            writer.close()
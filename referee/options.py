@@ -4,8 +4,9 @@ Provide a command-line argument parsing function using argparse
 
 -----------------------------------------------------------------------------
 usage: referee [-h] [-V] [-d [delay]] [-s [space_limit]] [-t [time_limit]]
-               [-D | -v [{0,1,2,3}]] [-l [LOGFILE]] [-c | -C] [-u | -a]
-               red blue n
+               [-D | -v [{0,1,2,3}]] [-l [LOGFILE]] [-r [RECORDFILE]] [-b]
+               [-i] [-p [PROFILEDIR]] [--profile-mode {cprofile,sample}]
+               [-c | -C] [-u | -a] red blue n
 
 conduct a game of Cachex between 2 Player classes.
 
@@ -53,6 +54,24 @@ optional arguments:
                         if you supply this flag the referee will create a
                         log of all game actions in a text file named LOGFILE
                         (default: game.log).
+  -r [RECORDFILE], --record [RECORDFILE]
+                        if you supply this flag the referee will append a
+                        compact binary record of the game to RECORDFILE
+                        (default: games.cxr; see referee/record.py).
+  -b, --bitboard        keep the referee's board state in integer bitmasks
+                        (faster move application and win detection).
+  -i, --isolate         run each player in its own process, with its own
+                        CPU time and memory accounting and limits enforced
+                        by the operating system.
+  -p [PROFILEDIR], --profile [PROFILEDIR]
+                        if you supply this flag the referee will profile
+                        every action of both players and write one profile
+                        per move to PROFILEDIR (default: profiles; see
+                        referee/profiling.py).
+  --profile-mode {cprofile,sample}
+                        with -p, profile deterministically with cProfile
+                        (default; pstats files) or by sampling stacks
+                        (lower overhead; collapsed stack files).
   -c, --colour          force colour display using ANSI control sequences
                         (default behaviour is automatic based on system).
   -C, --colourless      force NO colour display (see -c).
@@ -66,6 +85,7 @@ optional arguments:
 import sys
 import argparse
 from referee.game import GAME_NAME, COLOURS, NUM_PLAYERS
+from referee.profiling import MODES as PROFILE_MODES
 
 # Program information:
 PROGRAM = "referee"
@@ -100,6 +120,12 @@ VERBOSITY_NOVALUE = 3  # highest level, debug board
 LOGFILE_DEFAULT = None
 LOGFILE_NOVALUE = "game.log"
 
+RECORDFILE_DEFAULT = None
+RECORDFILE_NOVALUE = "games.cxr"
+
+PROFILEDIR_DEFAULT = None
+PROFILEDIR_NOVALUE = "profiles"
+
 PKG_SPEC_HELP = """
 The first argument is the size of the game board to play on (3 <= n <= 15).
 The next two arguments are 'package specifications'. These specify which
@@ -235,6 +261,56 @@ def get_options():
         "(default: %(const)s).",
     )
 
+    optionals.add_argument(
+        "-r",
+        "--record",
+        type=str,
+        nargs="?",
+        default=RECORDFILE_DEFAULT,
+        const=RECORDFILE_NOVALUE,
+        metavar="RECORDFILE",
+        help="if you supply this flag the referee will append a compact "
+        "binary record of the game to %(metavar)s (default: %(const)s; see "
+        "referee/record.py).",
+    )
+
+    optionals.add_argument(
+        "-b",
+        "--bitboard",
+        action="store_true",
+        help="keep the referee's board state in integer bitmasks (faster "
+        "move application and win detection).",
+    )
+
+    optionals.add_argument(
+        "-i",
+        "--isolate",
+        action="store_true",
+        help="run each player in its own process, with its own CPU time "
+        "and memory accounting and limits enforced by the operating system.",
+    )
+
+    optionals.add_argument(
+        "-p",
+        "--profile",
+        type=str,
+        nargs="?",
+        default=PROFILEDIR_DEFAULT,
+        const=PROFILEDIR_NOVALUE,
+        metavar="PROFILEDIR",
+        help="if you supply this flag the referee will profile every action "
+        "of both players and write one profile per move to %(metavar)s "
+        "(default: %(const)s; see referee/profiling.py).",
+    )
+    optionals.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        default=PROFILE_MODES[0],
+        help="with -p, profile deterministically with cProfile (default; "
+        "pstats files) or by sampling stacks (lower overhead; collapsed "
+        "stack files).",
+    )
+
     colour_group = optionals.add_mutually_exclusive_group()
     colour_group.add_argument(
         "-c",
@@ -313,3 +389,12 @@ class PackageSpecAction(argparse.Action):
 
         # save the result in the arguments namespace as a tuple
         setattr(namespace, self.dest, (mod, cls))
+
+
+def package_spec(loc):
+    """
+    Package specification for a (module, class) location, as parsed by
+    PackageSpecAction (the class name is left out if it is 'Player').
+    """
+    mod, cls = loc
+    return mod if cls == "Player" else f"{mod}:{cls}"
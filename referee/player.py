@@ -2,14 +2,20 @@
 Provide a wrapper for Player classes to handle tedious details like
 timing, measuring space usage, reporting which method is currently
 being executed, etc.
+
+Commentary is only formatted when the log level will show it, and usage is
+also kept unformatted in a preallocated GameMetrics record, so quiet runs
+(e.g. tournaments) pay next to nothing per call.
 """
 
 import gc
 import time
 import importlib
+from array import array
 
-from referee.log import comment, print
-from referee.game import NUM_PLAYERS
+from referee.log import comment, print, enabled
+from referee.game import NUM_PLAYERS, _MAX_TURNS
+from referee.profiling import profile_call
 
 
 class PlayerWrapper:
@@ -20,54 +26,103 @@ class PlayerWrapper:
     * `.action()` and `.update()` methods just delegate to the real Player's
         methods of the same name.
     Each method enforces resource limits on the real Player's computation.
+    A Player that starts processes of its own can define `.child_time()`,
+    returning the CPU seconds they have used so far; the increase over each
+    call is charged to its clock as well.
+    With a referee.profiling.MoveProfiler, every `.action()` call is also
+    profiled (inside the timer, so profiling overhead counts too).
     """
 
-    def __init__(self, name, player_loc, time_limit=None, space_limit=None):
+    def __init__(self, name, player_loc, time_limit=None, space_limit=None,
+            profiler=None):
         self.name = name
+        self.profiler = profiler
 
-        # create some context managers for resource limiting
-        self.timer = _CountdownTimer(time_limit, self.name)
+        # create some context managers for resource limiting (collecting
+        # garbage before each call only matters for enforcing limits)
+        self.timer = _CountdownTimer(
+            time_limit, self.name, collect=bool(time_limit or space_limit)
+        )
         if space_limit is not None:
             space_limit *= NUM_PLAYERS
         self.space = _MemoryWatcher(space_limit)
+        self.metrics = GameMetrics()
 
         # import the Player class from given package
         player_pkg, player_cls = player_loc
-        comment(
-            f"importing {self.name}'s player class '{player_cls}' "
-            f"from package '{player_pkg}'"
-        )
+        if enabled():
+            comment(
+                f"importing {self.name}'s player class '{player_cls}' "
+                f"from package '{player_pkg}'"
+            )
+        start = time.perf_counter()
         self.Player = _load_player_class(player_pkg, player_cls)
+        # wall-clock time taken to get the player ready (cheap if the
+        # package was already imported, e.g. by an earlier game)
+        self.startup = time.perf_counter() - start
 
     def init(self, colour, n):
         self.colour = colour
         self.name += f" ({colour})"
-        player_cls = str(self.Player).strip("<class >")
-        comment(f"initialising {self.colour} player as a {player_cls}")
+        if enabled():
+            player_cls = str(self.Player).strip("<class >")
+            comment(f"initialising {self.colour} player as a {player_cls}")
         with self.space, self.timer:
             # construct/initialise the player class
             self.player = self.Player(colour, n)
-        comment(self.timer.status(), depth=1)
-        comment(self.space.status(), depth=1)
+        self.timer.children = _child_timer(self.player)
+        self._report()
 
     def action(self):
-        comment(f"asking {self.name} for next action...")
+        if enabled():
+            comment(f"asking {self.name} for next action...")
+        target = None
+        if self.profiler is not None:
+            target = self.profiler.target(self.colour)
         with self.space, self.timer:
             # ask the real player
-            action = self.player.action()
-        comment(f"{self.name} returned action: {action!r}", depth=1)
-        comment(self.timer.status(), depth=1)
-        comment(self.space.status(), depth=1)
+            if target is None:
+                action = self.player.action()
+            else:
+                action = profile_call(self.player.action, *target)
+        if enabled():
+            comment(f"{self.name} returned action: {action!r}", depth=1)
+        self._report()
         # give back the result
         return action
 
     def turn(self, player, action):
-        comment(f"updating {self.name} with actions...")
+        if enabled():
+            comment(f"updating {self.name} with actions...")
         with self.space, self.timer:
             # forward to the real player
             self.player.turn(player, action)
-        comment(self.timer.status(), depth=1)
-        comment(self.space.status(), depth=1)
+        self._report()
+
+    def close(self):
+        """
+        Release the player: it lives in this process, so only call its own
+        close() method, if it has one (e.g. to stop worker processes).
+        """
+        close = getattr(getattr(self, "player", None), "close", None)
+        if close is not None:
+            close()
+
+    def _report(self):
+        """
+        Record the last call's usage, and comment on it if visible.
+        """
+        self.metrics.record(self.timer.elapsed, self.space.peak)
+        if enabled():
+            comment(self.timer.status(), depth=1)
+            comment(self.space.status(), depth=1)
+
+
+def _child_timer(player):
+    """
+    The player's `.child_time()` method, or None if it has none.
+    """
+    return getattr(player, "child_time", None)
 
 
 def _load_player_class(package_name, class_name):
@@ -86,6 +141,46 @@ class ResourceLimitException(Exception):
     """For when players exceed specified time / space limits."""
 
 
+# Most wrapped calls a player can receive in a game: init, plus an action or
+# a turn update for every turn of the longest possible game (with room to
+# spare for the opponent's turns)
+_MAX_CALLS = 1 + 2 * _MAX_TURNS
+
+
+class GameMetrics:
+    """
+    Per-game record of a player's resource usage: the CPU time and peak
+    space (MB, or 0 if not measured) of each wrapped call, kept in arrays
+    allocated up front so recording a call never formats or allocates.
+    """
+
+    def __init__(self, max_calls=_MAX_CALLS):
+        self.calls = 0
+        self.cpu = array("d", bytes(8 * max_calls))
+        self.space = array("d", bytes(8 * max_calls))
+
+    def record(self, cpu_time, peak_usage=None):
+        i = self.calls
+        if i < len(self.cpu):
+            self.cpu[i] = cpu_time
+            self.space[i] = peak_usage or 0.0
+        self.calls = i + 1
+
+    def summary(self):
+        """
+        Totals for the game so far: number of calls, total and slowest CPU
+        time, and peak space.
+        """
+        recorded = min(self.calls, len(self.cpu))
+        cpu = self.cpu[:recorded]
+        return {
+            "calls": self.calls,
+            "cpu": sum(cpu),
+            "max_cpu": max(cpu, default=0.0),
+            "peak_space": max(self.space[:recorded], default=0.0),
+        }
+
+
 class _CountdownTimer:
     """
     Reusable context manager for timing specific sections of code
@@ -93,39 +188,56 @@ class _CountdownTimer:
     * measures CPU time, not wall-clock time
     * unless time_limit is 0, throws an exception upon exiting the context
       after the allocated time has passed
+    * collects garbage before timing (which costs milliseconds per call)
+      only if `collect` is set or the timings will be shown
     """
 
-    def __init__(self, time_limit, name):
+    def __init__(self, time_limit, name, collect=True):
         """
         Create a new countdown timer with time limit `limit`, in seconds
         (0 for unlimited time)
         """
         self.name = name
         self.limit = time_limit
+        self.collect = collect
         self.clock = 0
-        self._status = ""
-
-    def _set_status(self, status):
-        self._status = status
+        self.elapsed = 0
+        # callable giving the CPU seconds used so far by the player's own
+        # child processes, which process_time() does not include (or None)
+        self.children = None
+        self.children_start = None
 
     def status(self):
-        return self._status
+        return (
+            f"time:  +{self.elapsed:6.3f}s  (just elapsed)  "
+            f"{self.clock:7.3f}s  (game total)"
+        )
 
     def __enter__(self):
-        # clean up memory off the clock
-        gc.collect()
+        # clean up memory off the clock (if it matters)
+        if self.collect or enabled():
+            gc.collect()
         # then start timing
         self.start = time.process_time()
+        if self.children is not None:
+            self.children_start = self.children()
         return self  # unused
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         # accumulate elapsed time since __enter__
         elapsed = time.process_time() - self.start
+        if self.children_start is not None:
+            elapsed += self.children() - self.children_start
+            self.children_start = None
+        self.charge(elapsed)
+
+    def charge(self, elapsed):
+        """
+        Add elapsed seconds of CPU time (measured here or elsewhere, e.g.
+        by a player's own process) to the clock and check the limit.
+        """
+        self.elapsed = elapsed
         self.clock += elapsed
-        self._set_status(
-            f"time:  +{elapsed:6.3f}s  (just elapsed)  "
-            f"{self.clock:7.3f}s  (game total)"
-        )
 
         # if we are limited, let's hope we aren't out of time!
         if self.limit is not None and self.limit > 0:
@@ -141,19 +253,30 @@ class _MemoryWatcher:
     after using a specific section of code.
 
     * works by parsing procfs; only available on linux.
+    * procfs is only read if there is a limit or the usage will be shown.
     * unless the limit is set to 0, throws an exception upon exiting the
       context if the memory limit has been breached
     """
 
-    def __init__(self, space_limit):
+    def __init__(self, space_limit, name=None):
+        """
+        Create a watcher for the given limit (MB, 0 for unlimited). With a
+        name, usage is that player's alone (see referee.isolated), rather
+        than shared by all players in this process.
+        """
         self.limit = space_limit
-        self._status = ""
-
-    def _set_status(self, status):
-        self._status = status
+        self.name = name
+        # last measured usage (MB), or None if not measured
+        self.curr = self.peak = None
 
     def status(self):
-        return self._status
+        if self.peak is None:
+            return ""
+        owner = "shared" if self.name is None else "own process"
+        return (
+            f"space: {self.curr:7.3f}MB (current usage) "
+            f"{self.peak:7.3f}MB (max usage) ({owner})"
+        )
 
     def __enter__(self):
         return self  # unused
@@ -163,25 +286,33 @@ class _MemoryWatcher:
         Check up on the current and peak space usage of the process, printing
         stats and ensuring that peak usage is not exceeding limits
         """
-        if _SPACE_ENABLED:
+        if _SPACE_ENABLED and (self.limit or enabled()):
             curr_usage, peak_usage = _get_space_usage()
 
             # adjust measurements to reflect usage of players and referee, not
             # the Python interpreter itself
-            curr_usage -= _DEFAULT_MEM_USAGE
-            peak_usage -= _DEFAULT_MEM_USAGE
-
-            self._set_status(
-                f"space: {curr_usage:7.3f}MB (current usage) "
-                f"{peak_usage:7.3f}MB (max usage) (shared)"
+            self.record(
+                curr_usage - _DEFAULT_MEM_USAGE,
+                peak_usage - _DEFAULT_MEM_USAGE,
             )
 
-            # if we are limited, let's hope we are not out of space!
-            if self.limit is not None and self.limit > 0:
-                if peak_usage > self.limit:
+    def record(self, curr_usage, peak_usage):
+        """
+        Report current and peak space usage (MB, measured here or by a
+        player's own process) and ensure peak usage is within the limit.
+        """
+        self.curr, self.peak = curr_usage, peak_usage
+
+        # if we are limited, let's hope we are not out of space!
+        if self.limit is not None and self.limit > 0:
+            if peak_usage > self.limit:
+                if self.name is None:
                     raise ResourceLimitException(
                         "players exceeded shared space limit"
                     )
+                raise ResourceLimitException(
+                    f"{self.name} exceeded available space"
+                )
 
 
 def _get_space_usage():
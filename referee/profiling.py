@@ -0,0 +1,186 @@
+"""
+Profile every action a player is asked for, and write one file per move,
+named by game, turn and colour (e.g. game00012-turn007-red.prof), so that a
+slow move can be traced to the functions it spent its time in.
+
+Two modes are available:
+* "cprofile" (deterministic) writes pstats files, for `python -m pstats` or
+  any pstats viewer. It sees every call, but slows down call-heavy code
+  several times over, and the overhead is charged to the player's clock.
+* "sample" interrupts the player every `interval` seconds of CPU time
+  (with SIGPROF, so only on Unix) and writes the sampled stacks in
+  collapsed ("folded") format, one `frame;frame;frame count` line per
+  distinct stack, for flamegraph.pl, speedscope and similar tools. The
+  overhead is small enough to profile under real time limits, but the
+  kernel only delivers the signal on its scheduler tick (often every 4ms),
+  so moves quicker than that may record no samples at all.
+
+usage: python -m referee.profiling [-k TOP] PROFILEDIR_OR_FILE [...]
+       (prints the slowest profiled moves and their most expensive
+       functions)
+"""
+
+import os
+import sys
+import signal
+import pstats
+import argparse
+import cProfile
+from collections import Counter
+
+from referee.game import COLOURS
+
+MODES = ("cprofile", "sample")
+
+# Default seconds of CPU time between samples
+SAMPLE_INTERVAL = 0.001
+
+_SUFFIXES = {"cprofile": ".prof", "sample": ".folded"}
+
+
+class MoveProfiler:
+    """
+    Profiling settings for the players of one game, which also numbers
+    their moves: `.target(colour)` gives the (path, mode, interval) with
+    which to profile that colour's next action (see profile_call).
+    """
+
+    def __init__(self, directory, mode="cprofile", interval=SAMPLE_INTERVAL,
+            game=None):
+        if mode not in MODES:
+            raise ValueError(f"unknown profiling mode {mode!r}")
+        if mode == "sample" and not hasattr(signal, "setitimer"):
+            raise ValueError("sampling needs signal.setitimer, which is not "
+                "available on this platform (use cprofile)")
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        self.game = game
+        self.actions = dict.fromkeys(COLOURS, 0)
+        os.makedirs(directory, exist_ok=True)
+
+    def target(self, colour):
+        """
+        (path, mode, interval) for profiling the colour's next action.
+        """
+        self.actions[colour] += 1
+        # red plays the odd turns and blue the even ones (even after a steal)
+        turn = 2 * self.actions[colour] - (colour == COLOURS[0])
+        name = f"turn{turn:03d}-{colour}{_SUFFIXES[self.mode]}"
+        if self.game is not None:
+            name = f"game{self.game:05d}-{name}"
+        return os.path.join(self.directory, name), self.mode, self.interval
+
+
+def profile_call(function, path, mode, interval=SAMPLE_INTERVAL):
+    """
+    Call function() under the profiler of the given mode, write the profile
+    to path and return the function's result.
+    """
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(function)
+        finally:
+            profiler.dump_stats(path)
+
+    # sample: count the stacks (below this frame) interrupted by SIGPROF
+    base = sys._getframe()
+    stacks = Counter()
+
+    def sample(signum, frame):
+        stack = []
+        while frame is not None and frame is not base:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        stacks[";".join(reversed(stack))] += 1
+
+    previous = signal.signal(signal.SIGPROF, sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    try:
+        return function()
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+        with open(path, "w") as file:
+            for stack, count in stacks.items():
+                if stack:
+                    print(stack, count, file=file)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+
+# SUMMARIES
+
+
+def summarise(path, top=3):
+    """
+    (total seconds or samples, [(function, share of the total)...]) for one
+    profile file, with the top functions by time spent in the function
+    itself (not its callees).
+    """
+    if path.endswith(_SUFFIXES["sample"]):
+        totals = Counter()
+        with open(path) as file:
+            for line in file:
+                stack, _, count = line.rstrip().rpartition(" ")
+                totals[stack.rsplit(";", 1)[-1]] += int(count)
+        total = sum(totals.values())
+        return total, [(f, c / total) for f, c in totals.most_common(top)]
+
+    stats = pstats.Stats(path)
+    total = stats.total_tt
+    functions = sorted(
+        ((tottime, f"{os.path.basename(func[0])}:{func[2]}:{func[1]}")
+            for func, (_, _, tottime, _, _) in stats.stats.items()),
+        reverse=True,
+    )
+    return total, [(name, t / total if total else 0)
+        for t, name in functions[:top]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="referee.profiling",
+        description="list the slowest profiled moves and what they spent "
+        "their time on.",
+    )
+    parser.add_argument(
+        "paths", metavar="PATH", nargs="+",
+        help="profile file, or directory of profile files.",
+    )
+    parser.add_argument(
+        "-k", "--top", type=int, default=10,
+        help="number of moves to list (default: %(default)s).",
+    )
+    options = parser.parse_args(argv)
+
+    files = []
+    for path in options.paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith(tuple(_SUFFIXES.values()))
+            )
+        else:
+            files.append(path)
+    summaries = sorted(
+        ((summarise(path), path) for path in files),
+        key=lambda item: item[0][0],
+        reverse=True,
+    )
+    for (total, functions), path in summaries[: options.top]:
+        if path.endswith(_SUFFIXES["sample"]):
+            print(f"{os.path.basename(path)}: {total} samples")
+        else:
+            print(f"{os.path.basename(path)}: {total:.3f}s")
+        for name, share in functions:
+            print(f"    {share:6.1%}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Provide a compact binary format for recording many games, as an alternative
+to the referee's text log, with a writer that hooks into Game and a reader
+that memory-maps record files.
+
+A record file starts with the 4 byte magic string MAGIC, followed by any
+number of games. Each game is a fixed header (see _HEADER):
+
+    n         board size                                      1 byte
+    result    one of the RESULT_* codes                       1 byte
+    moves     number of actions played                        2 bytes
+    red, blue lengths of the players' names (UTF-8)           1 byte each
+
+then the red and blue player names, then one byte per action: the cell
+index r * n + q of a PLACE action, or STEAL_CODE for a STEAL action (boards
+are at most MAX_N x MAX_N, so every cell index fits in a byte). All integers
+are little-endian.
+
+usage: python -m referee.record RECORDFILE [RECORDFILE ...]
+       (prints a summary of the games in the given files)
+"""
+
+import sys
+import mmap
+import struct
+
+from referee.game import COLOURS
+
+MAGIC = b"CXR2"
+
+# Game header: n, result, number of moves, lengths of the two names
+_HEADER = struct.Struct("<BBHBB")
+
+# Largest board size the format holds (the referee allows up to 15 too)
+MAX_N = 15
+
+# Result codes
+RESULT_NONE = 0  # the game did not finish (e.g. illegal action)
+RESULT_RED = 1
+RESULT_BLUE = 2
+RESULT_DRAW_REPEAT = 3
+RESULT_DRAW_TURNS = 4
+
+RESULT_NAMES = {
+    RESULT_NONE: "unfinished",
+    RESULT_RED: "winner: red",
+    RESULT_BLUE: "winner: blue",
+    RESULT_DRAW_REPEAT: "draw: repeated state",
+    RESULT_DRAW_TURNS: "draw: maximum turns",
+}
+
+# Entry for a STEAL action (never a valid cell index)
+STEAL_CODE = 0xFF
+
+
+def result_code(result):
+    """
+    RESULT_* code for a result string returned by Game.end() (or None).
+    """
+    if not result:
+        return RESULT_NONE
+    if result.startswith("winner: "):
+        return RESULT_RED if result.endswith(COLOURS[0]) else RESULT_BLUE
+    if result.startswith("draw: same"):
+        return RESULT_DRAW_REPEAT
+    return RESULT_DRAW_TURNS
+
+
+def _check_size(n):
+    if n > MAX_N:
+        raise ValueError(f"cannot record games on boards larger than "
+            f"{MAX_N} x {MAX_N}")
+
+
+def encode_game(n, moves, result=RESULT_NONE, players=("", "")):
+    """
+    Encode one game as bytes. moves is a bytes-like object of move entries
+    (see GameRecorder) or a list of actions.
+    """
+    _check_size(n)
+    if not isinstance(moves, (bytes, bytearray, memoryview)):
+        moves = _encode_moves(n, moves)
+    red, blue = (name.encode("utf-8")[:255] for name in players)
+    header = _HEADER.pack(n, result, len(moves), len(red), len(blue))
+    return b"".join((header, red, blue, moves))
+
+
+def _encode_moves(n, actions):
+    return bytearray(
+        STEAL_CODE if action[0] == "STEAL" else action[1] * n + action[2]
+        for action in actions
+    )
+
+
+class GameRecorder:
+    """
+    Records one game in the binary format. Pass it to Game (or play) as
+    `recorder`: Game calls `.start(n)` when created, `.move(action)` after
+    each valid action and `.end(result)` when the game is concluded, at
+    which point the encoded game is written to `file` (if any) and kept in
+    `.data`.
+    """
+
+    def __init__(self, file=None, players=("", "")):
+        self.file = file
+        self.players = players
+        # move entries so far (None until the game starts)
+        self.moves = None
+        self.data = None
+
+    def start(self, n):
+        _check_size(n)
+        self.n = n
+        self.moves = bytearray()
+        self.data = None
+
+    def move(self, action):
+        if action[0] == "STEAL":
+            self.moves.append(STEAL_CODE)
+        else:
+            self.moves.append(action[1] * self.n + action[2])
+
+    def end(self, result):
+        """
+        Encode the game with the given result string (None if the game did
+        not finish) and write it to the file.
+        """
+        self.data = encode_game(
+            self.n,
+            self.moves,
+            result_code(result),
+            self.players,
+        )
+        if self.file is not None:
+            self.file.write(self.data)
+        return self.data
+
+
+class RecordWriter:
+    """
+    Append-only record file, writing MAGIC first if the file is new. Has a
+    `write(data)` method for use as a GameRecorder's file.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+
+    def write(self, data):
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class GameRecord:
+    """
+    One game read from a record file.
+    """
+
+    __slots__ = ("n", "result", "players", "moves")
+
+    def __init__(self, n, result, players, moves):
+        self.n = n
+        self.result = result
+        self.players = players
+        # raw move entries (see the module docstring)
+        self.moves = moves
+
+    def __len__(self):
+        return len(self.moves)
+
+    def actions(self):
+        """
+        Yield the game's actions as the referee's action tuples.
+        """
+        for code in self.moves:
+            if code == STEAL_CODE:
+                yield ("STEAL",)
+            else:
+                yield ("PLACE", *divmod(code, self.n))
+
+    def __repr__(self):
+        return (
+            f"GameRecord(n={self.n}, result={RESULT_NAMES[self.result]!r}, "
+            f"players={self.players!r}, moves={len(self)})"
+        )
+
+
+def read_records(path):
+    """
+    Yield each GameRecord in a record file in turn. The file is memory-mapped,
+    so only the games being looked at need to be in memory.
+    """
+    with open(path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return
+        with data:
+            if data[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a game record file")
+            offset = len(MAGIC)
+            while offset < len(data):
+                record, offset = _read_game(data, offset)
+                yield record
+
+
+def _read_game(data, offset):
+    """
+    Read the game at offset. Returns (record, offset of the next game).
+    """
+    n, result, moves, red, blue = _HEADER.unpack_from(data, offset)
+    offset += _HEADER.size
+    players = (
+        data[offset : offset + red].decode("utf-8"),
+        data[offset + red : offset + red + blue].decode("utf-8"),
+    )
+    offset += red + blue
+    end = offset + moves
+    return GameRecord(n, result, players, data[offset:end]), end
+
+
+def main(argv=None):
+    """
+    Print a summary of the games in the given record files.
+    """
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print(__doc__.strip().splitlines()[-2].strip())
+        return
+    games = moves = 0
+    results = dict.fromkeys(RESULT_NAMES, 0)
+    sizes = {}
+    for path in paths:
+        for record in read_records(path):
+            games += 1
+            moves += len(record)
+            results[record.result] += 1
+            sizes[record.n] = sizes.get(record.n, 0) + 1
+    print(f"games: {games}")
+    if games:
+        print(f"average moves: {moves / games:.1f}")
+        for code, count in results.items():
+            print(f"{RESULT_NAMES[code]:>22}: {count}")
+        for n in sorted(sizes):
+            print(f"{'n = ' + str(n):>22}: {sizes[n]}")
+
+
+if __name__ == "__main__":
+    main()
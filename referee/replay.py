@@ -0,0 +1,338 @@
+"""
+Replay recorded games through referee.game.Game without running any
+players: read text game logs (written with the referee's -l option) or
+binary record files (-r, see referee.record), drive Game.update with the
+recorded actions, and check that every action is still legal, that the
+logged captures happen, and that each game ends with the recorded result.
+
+Replaying whole directories (e.g. after changing the rules or the board
+implementation) checks them against historical games; --ply shows the board
+of a single game at any point instead.
+
+usage: python -m referee.replay [-n N] [-p PLY] [-g GAME] [-j JOBS] [-B] [-q]
+           PATH [PATH ...]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import multiprocessing
+from ast import literal_eval
+
+from referee.game import Game, IllegalActionException, _RENDER, COLOURS
+from referee.board import Board
+from referee.bitboard import BitBoard
+from referee.record import MAGIC, RESULT_NAMES, RESULT_NONE, read_records
+from referee.record import result_code
+
+# Files to replay when given a directory
+LOG_SUFFIX = ".log"
+RECORD_SUFFIX = ".cxr"
+
+# Game log lines (see Game.__init__, Game.update, Game.end)
+_SIZE_LINE = re.compile(r"board size: (\d+)$")
+_TURN_LINE = re.compile(
+    r"turn (\d+): (red|blue): (?:(STEAL) first move|"
+    r"PLACE token in cell \((\d+), (\d+)\))(?: capturing (\[.*\]))?$"
+)
+_ERROR_LINE = re.compile(r"error: (red|blue): illegal action (.*)$")
+_RESULT_PREFIXES = ("winner: ", "draw: ")
+
+# Largest board, for guessing the size of logs that do not record it
+_MAX_N = 15
+
+
+class ReplayError(Exception):
+    """For when a recorded game does not replay as recorded."""
+
+
+class RecordedGame:
+    """
+    One game as recorded: the board size (None if unknown), the actions
+    played as (colour, action) pairs, the captures logged for each action
+    (None where unknown), the recorded result code, and the final illegal
+    action (if the game ended with one).
+    """
+
+    __slots__ = ("name", "n", "actions", "captures", "result", "illegal")
+
+    def __init__(self, name, n, actions, captures=None, result=RESULT_NONE,
+            illegal=None):
+        self.name = name
+        self.n = n
+        self.actions = actions
+        self.captures = captures
+        self.result = result
+        self.illegal = illegal
+
+
+def parse_log(lines, name="game log"):
+    """
+    Parse the lines of a text game log into a RecordedGame.
+    """
+    n = None
+    actions = []
+    captures = []
+    result = RESULT_NONE
+    illegal = None
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        match = _TURN_LINE.match(line)
+        if match:
+            turn, colour, steal, r, q, captured = match.groups()
+            if int(turn) != len(actions) + 1:
+                raise ReplayError(f"{name}:{number}: expected turn "
+                    f"{len(actions) + 1}, found turn {turn}")
+            if steal:
+                actions.append((colour, ("STEAL",)))
+            else:
+                actions.append((colour, ("PLACE", int(r), int(q))))
+            captures.append(literal_eval(captured) if captured else [])
+            continue
+        match = _SIZE_LINE.match(line)
+        if match:
+            n = int(match.group(1))
+            continue
+        match = _ERROR_LINE.match(line)
+        if match:
+            colour, action = match.groups()
+            illegal = (colour, literal_eval(action))
+            continue
+        if line.startswith(_RESULT_PREFIXES):
+            result = result_code(line)
+            continue
+        raise ReplayError(f"{name}:{number}: unrecognised line {line!r}")
+
+    # Logs from before captures were logged list none at all
+    if not any(captures):
+        captures = None
+    return RecordedGame(name, n, actions, captures, result, illegal)
+
+
+def load(path):
+    """
+    Yield each RecordedGame in a text game log or binary record file.
+    """
+    with open(path, "rb") as file:
+        binary = file.read(len(MAGIC)) == MAGIC
+    if not binary:
+        with open(path) as file:
+            yield parse_log(file, name=path)
+        return
+    for index, record in enumerate(read_records(path)):
+        actions = [
+            (COLOURS[turn % 2], action)
+            for turn, action in enumerate(record.actions())
+        ]
+        yield RecordedGame(f"{path}#{index}", record.n, actions,
+            result=record.result)
+
+
+def replay(recorded, board_cls=BitBoard, ply=None):
+    """
+    Replay a RecordedGame, raising ReplayError if it does not play out as
+    recorded. Returns the Game, after ply actions if ply is given (without
+    checking the rest of the game).
+    """
+    n = recorded.n
+    if n is None:
+        n = _guess_size(recorded, board_cls)
+    game = Game(n, board_cls=board_cls)
+    if ply == 0:
+        return game
+
+    for turn, (colour, action) in enumerate(recorded.actions, start=1):
+        if game.over():
+            raise ReplayError(f"{recorded.name}: game ended after turn "
+                f"{game.nturns}, but {len(recorded.actions)} turns were "
+                "recorded")
+        try:
+            game.update(colour, action)
+        except IllegalActionException as e:
+            raise ReplayError(f"{recorded.name}: turn {turn}: {e}")
+        if recorded.captures is not None and action[0] == "PLACE":
+            captured = sorted((int(r), int(q)) for r, q in game.last_captures)
+            if captured != sorted(recorded.captures[turn - 1]):
+                raise ReplayError(f"{recorded.name}: turn {turn}: captured "
+                    f"{captured}, but {recorded.captures[turn - 1]} was "
+                    "recorded")
+        if turn == ply:
+            return game
+
+    if recorded.illegal is not None:
+        colour, action = recorded.illegal
+        try:
+            game.update(colour, action)
+        except IllegalActionException:
+            return game
+        raise ReplayError(f"{recorded.name}: recorded illegal action "
+            f"{action!r} is legal")
+
+    if result_code(game.result) != recorded.result:
+        raise ReplayError(f"{recorded.name}: ended with "
+            f"{RESULT_NAMES[result_code(game.result)]!r}, but "
+            f"{RESULT_NAMES[recorded.result]!r} was recorded")
+    return game
+
+
+def _guess_size(recorded, board_cls):
+    """
+    Smallest board size on which a game (from a log that does not record
+    its size) replays as recorded.
+    """
+    coords = [a[1:] for _, a in recorded.actions if a[0] == "PLACE"]
+    smallest = max((max(coord) for coord in coords), default=2) + 1
+    for n in range(max(3, smallest), _MAX_N + 1):
+        recorded.n = n
+        try:
+            replay(recorded, board_cls)
+            return n
+        except ReplayError:
+            pass
+        finally:
+            recorded.n = None
+    raise ReplayError(f"{recorded.name}: no board size replays this game")
+
+
+def find_files(paths):
+    """
+    Yield the given files, and the log and record files in the given
+    directories (recursively, in sorted order).
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith((LOG_SUFFIX, RECORD_SUFFIX)):
+                    yield os.path.join(root, name)
+
+
+def verify(paths, board_cls=BitBoard, n=None, jobs=1, out=sys.stdout):
+    """
+    Replay every game in the given files and directories (in a pool of
+    jobs processes if jobs > 1), printing each failure. Returns (games
+    replayed, failures).
+    """
+    tasks = [(path, board_cls, n) for path in find_files(paths)]
+    if jobs > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            results = list(pool.imap(_verify_file, tasks, chunksize=16))
+    else:
+        results = map(_verify_file, tasks)
+    games = failures = 0
+    for file_games, messages in results:
+        games += file_games
+        failures += len(messages)
+        for message in messages:
+            print(f"FAIL {message}", file=out)
+    return games, failures
+
+
+def _verify_file(task):
+    """
+    Replay every game in one file. Returns (games, failure messages).
+    """
+    path, board_cls, n = task
+    games = 0
+    messages = []
+    try:
+        for recorded in load(path):
+            games += 1
+            if recorded.n is None:
+                recorded.n = n
+            try:
+                replay(recorded, board_cls)
+            except ReplayError as e:
+                messages.append(str(e))
+    except (ReplayError, ValueError, OSError) as e:
+        games += 1
+        messages.append(f"{path}: {e}")
+    return games, messages
+
+
+def get_options(argv=None):
+    """Parse and return replay command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="referee.replay",
+        description="replay recorded games of Cachex without players, and "
+        "check they still play out as recorded.",
+    )
+    parser.add_argument(
+        "paths", metavar="PATH", nargs="+",
+        help="game log (.log), game record (.cxr) or directory of them.",
+    )
+    parser.add_argument(
+        "-n", type=int, default=None,
+        help="board size for game logs that do not record it (default: "
+        "the smallest size on which the game replays).",
+    )
+    parser.add_argument(
+        "-p", "--ply", type=int, default=None,
+        help="print the board after this many actions of one game instead "
+        "of verifying.",
+    )
+    parser.add_argument(
+        "-g", "--game", type=int, default=0,
+        help="with --ply, which game of a record file to show (default: "
+        "%(default)s).",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of files to replay at once (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-B", "--board", action="store_true",
+        help="replay on the referee's original Board instead of BitBoard.",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="only print failures.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = get_options(argv)
+    board_cls = Board if options.board else BitBoard
+
+    if options.ply is not None:
+        for index, recorded in enumerate(load(options.paths[0])):
+            if index == options.game:
+                break
+        else:
+            sys.exit(f"no game {options.game} in {options.paths[0]}")
+        recorded.n = recorded.n or options.n
+        try:
+            game = replay(recorded, board_cls, ply=options.ply)
+        except ReplayError as e:
+            sys.exit(f"FAIL {e}")
+        message = f"{recorded.name}: after {game.nturns} actions"
+        if game.result:
+            message += f" ({game.result})"
+        print(_RENDER(game, message=message))
+        return
+
+    start = time.perf_counter()
+    games, failures = verify(
+        options.paths, board_cls, options.n, max(1, options.jobs)
+    )
+    elapsed = time.perf_counter() - start
+    if not options.quiet:
+        rate = games / elapsed if elapsed > 0 else 0
+        print(
+            f"replayed {games} games in {elapsed:.3f}s ({rate:.0f} games/s): "
+            f"{games - failures} ok, {failures} failed"
+        )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
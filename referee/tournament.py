@@ -0,0 +1,382 @@
+"""
+Headless tournament runner: play many games between two Player classes in a
+pool of worker processes, with board rendering and commentary disabled.
+
+One JSON object is streamed per finished game (to stdout or --output), and
+aggregated win/draw rates, average turn counts, per-player CPU time and
+per-game startup time are printed at the end. With --isolate, each player
+package is imported once by a fork server (see referee.isolated) and every
+game forks warm player processes from it, unless --no-prefork is given.
+With --record, every game is also appended to a binary record file (see
+referee.record), and with --profile, every move is profiled into a file
+tagged with its game, turn and colour (see referee.profiling).
+
+usage: python -m referee.tournament [-g GAMES] [-n SIZES] [-S SCHEDULE]
+           [-j JOBS] [-t TIME] [-s SPACE] [-b] [-i] [--no-prefork]
+           [-o OUTPUT] [-r RECORD] [-p PROFILEDIR]
+           [--profile-mode {cprofile,sample}] player1 player2
+
+Example: python -m referee.tournament alcos_inc alcos_inc:MCTSPlayer \\
+             -g 100 -n 5-11 -j 4
+"""
+
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+from referee.log import config
+from referee.game import play, IllegalActionException, COLOURS
+from referee.board import Board
+from referee.bitboard import BitBoard
+from referee.player import PlayerWrapper
+from referee.player import ResourceLimitException, set_space_line
+from referee.isolated import IsolatedPlayerWrapper, PlayerProcessError
+from referee.isolated import PlayerServer
+from referee.options import PackageSpecAction, package_spec
+from referee.record import GameRecorder, RecordWriter
+from referee.profiling import MoveProfiler, MODES as PROFILE_MODES
+
+# Colour-swap schedules: which games player 2 plays as red
+SCHEDULES = {
+    "none": lambda game, games: False,
+    "alternate": lambda game, games: game % 2 == 1,
+    "half": lambda game, games: game >= games // 2,
+}
+
+
+class _Counting:
+    """
+    Mixin for player wrappers to also count the actions taken.
+    """
+
+    def init(self, colour, n):
+        self.actions = 0
+        super().init(colour, n)
+
+    def action(self):
+        self.actions += 1
+        return super().action()
+
+
+class _CountingWrapper(_Counting, PlayerWrapper):
+    pass
+
+
+class _CountingIsolatedWrapper(_Counting, IsolatedPlayerWrapper):
+    pass
+
+
+def get_options(argv=None):
+    """Parse and return tournament command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="referee.tournament",
+        description="play many headless games of Cachex between 2 Player "
+        "classes in parallel.",
+    )
+    for num in (1, 2):
+        parser.add_argument(
+            f"player{num}_loc",
+            metavar=f"player{num}",
+            action=PackageSpecAction,
+            help=f"location of player {num}'s Player class (e.g. package "
+            "name, optionally followed by ':ClassName')",
+        )
+    parser.add_argument(
+        "-g", "--games", type=int, default=10,
+        help="number of games to play (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-n", "--sizes", type=_parse_sizes, default=[5],
+        help="board sizes to cycle through, e.g. '5', '3-15' or '5,7,9' "
+        "(default: 5).",
+    )
+    parser.add_argument(
+        "-S", "--schedule", choices=sorted(SCHEDULES), default="alternate",
+        help="when player 2 plays red: 'none' (never), 'alternate' (every "
+        "second game, so each size is played both ways) or 'half' (the "
+        "second half of the games) (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=multiprocessing.cpu_count(),
+        help="number of games to play at once (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "-t", "--time", type=float, default=0,
+        help="limit on CPU time (float, seconds) for each player per game "
+        "(default: no limit).",
+    )
+    parser.add_argument(
+        "-s", "--space", type=float, default=0,
+        help="limit on memory space (float, MB) for each player (default: "
+        "no limit).",
+    )
+    parser.add_argument(
+        "-b", "--bitboard", action="store_true",
+        help="keep the referee's board state in integer bitmasks.",
+    )
+    parser.add_argument(
+        "-i", "--isolate", action="store_true",
+        help="run each player in its own process, with its own CPU time "
+        "and memory accounting and limits.",
+    )
+    parser.add_argument(
+        "--no-prefork", dest="prefork", action="store_false",
+        help="with --isolate, start every player process from scratch "
+        "instead of forking it from a server that imported it once.",
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, default=None,
+        help="write one JSON line per game to this file instead of stdout.",
+    )
+    parser.add_argument(
+        "-r", "--record", type=str, default=None,
+        help="append a binary record of every game to this file.",
+    )
+    parser.add_argument(
+        "-p", "--profile", type=str, default=None, metavar="PROFILEDIR",
+        help="profile every move of every game into this directory.",
+    )
+    parser.add_argument(
+        "--profile-mode", choices=PROFILE_MODES, default=PROFILE_MODES[0],
+        help="with --profile, profile deterministically with cProfile "
+        "(default) or by sampling stacks (lower overhead).",
+    )
+    return parser.parse_args(argv)
+
+
+def _parse_sizes(text):
+    """
+    Parse '5', '3-15' or '5,7,9' into a list of board sizes.
+    """
+    sizes = []
+    for part in text.split(","):
+        if "-" in part:
+            low, high = part.split("-")
+            sizes.extend(range(int(low), int(high) + 1))
+        else:
+            sizes.append(int(part))
+    if not sizes or any(n < 3 or n > 15 for n in sizes):
+        raise argparse.ArgumentTypeError("board sizes must be in 3..15")
+    return sizes
+
+
+def schedule_games(options):
+    """
+    List of (game number, n, player 1's colour) tasks.
+    """
+    swapped = SCHEDULES[options.schedule]
+    # Alternating colours play each size twice in a row (once each way)
+    period = 2 if options.schedule == "alternate" else 1
+    tasks = []
+    for game in range(options.games):
+        n = options.sizes[(game // period) % len(options.sizes)]
+        colour = "blue" if swapped(game, options.games) else "red"
+        tasks.append((game, n, colour))
+    return tasks
+
+
+def _init_worker(space):
+    """
+    Silence all referee output in this worker process.
+    """
+    config(level=-1)
+    if space:
+        set_space_line()
+
+
+def play_game(task, player_locs, time_limit=0, space_limit=0, board_cls=Board,
+        isolate=False, servers=None, profile=None, recorder=None):
+    """
+    Play one headless game and return a dict describing its result.
+    player_locs are the (package, class) locations of players 1 and 2, and
+    servers optionally maps them to PlayerServers (with isolate only).
+    profile is an optional (directory, mode) in which to profile every
+    move. A GameRecorder, if given, records the game (even if it does not
+    finish).
+    """
+    game, n, player1_colour = task
+    if player1_colour == "red":
+        locs = dict(zip(COLOURS, player_locs))
+    else:
+        locs = dict(zip(COLOURS, player_locs[::-1]))
+    record = {
+        "game": game,
+        "n": n,
+        "player1": player1_colour,
+        "red": package_spec(locs["red"]),
+        "blue": package_spec(locs["blue"]),
+    }
+    if recorder is not None:
+        recorder.players = (record["red"], record["blue"])
+    start = time.perf_counter()
+    options = {"time_limit": time_limit, "space_limit": space_limit}
+    if profile is not None:
+        directory, mode = profile
+        options["profiler"] = MoveProfiler(directory, mode, game=game)
+    wrapper_cls = _CountingWrapper
+    if isolate:
+        wrapper_cls = _CountingIsolatedWrapper
+    players = []
+    try:
+        for colour in COLOURS:
+            if servers:
+                options["server"] = servers[locs[colour]]
+            players.append(wrapper_cls(colour, locs[colour], **options))
+        result = play(
+            players,
+            n=n,
+            print_state=False,
+            board_cls=board_cls,
+            recorder=recorder,
+        )
+        if result.startswith("winner: "):
+            record["result"] = "win"
+            record["winner"] = result[len("winner: "):]
+        else:
+            record["result"] = "draw"
+            record["winner"] = None
+        record["message"] = " ".join(result.split())
+    except (IllegalActionException, ResourceLimitException,
+            PlayerProcessError) as e:
+        record["result"] = "error"
+        record["winner"] = None
+        record["message"] = str(e)
+    except Exception as e:
+        # anything else a player raised (from its constructor, action or
+        # turn) ends just this game, as PlayerProcessError does for
+        # isolated players, so the other games and the summary survive
+        record["result"] = "error"
+        record["winner"] = None
+        record["message"] = f"{type(e).__name__}: {e}"
+    finally:
+        for player in players:
+            player.close()
+    if recorder is not None and recorder.data is None and \
+            recorder.moves is not None:
+        recorder.end(None)
+
+    record["turns"] = sum(getattr(p, "actions", 0) for p in players)
+    record["metrics"] = {
+        c: p.metrics.summary() for c, p in zip(COLOURS, players)
+    }
+    record["startup"] = {c: 0.0 for c in COLOURS}
+    record["startup"].update((c, p.startup) for c, p in zip(COLOURS, players))
+    record["cpu"] = {c: 0.0 for c in COLOURS}
+    record["cpu"].update((c, p.timer.clock) for c, p in zip(COLOURS, players))
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def _run(args):
+    """
+    Play a game in a worker. Returns its result and its binary record (or
+    None), which the main process writes to the record file.
+    """
+    *args, record_game = args
+    recorder = GameRecorder() if record_game else None
+    record = play_game(*args, recorder=recorder)
+    return record, recorder.data if recorder is not None else None
+
+
+def summarise(records, player_locs):
+    """
+    Aggregate game records into statistics for players 1 and 2.
+    """
+    stats = {}
+    for num, loc in enumerate(player_locs, start=1):
+        stats[f"{num}: {package_spec(loc)}"] = {
+            "games": 0, "wins": 0, "draws": 0, "errors": 0,
+            "turns": 0, "cpu": 0.0, "startup": 0.0,
+        }
+    names = list(stats)
+    for record in records:
+        for name, colour in zip(names, _player_colours(record)):
+            s = stats[name]
+            s["games"] += 1
+            s["turns"] += record["turns"]
+            s["cpu"] += record["cpu"][colour]
+            s["startup"] += record["startup"][colour]
+            if record["result"] == "win" and record["winner"] == colour:
+                s["wins"] += 1
+            elif record["result"] == "draw":
+                s["draws"] += 1
+            elif record["result"] == "error":
+                s["errors"] += 1
+    return stats
+
+
+def _player_colours(record):
+    """
+    (player 1's colour, player 2's colour) in a game record.
+    """
+    return ("red", "blue") if record["player1"] == "red" else ("blue", "red")
+
+
+def print_summary(stats, file=sys.stdout):
+    print(
+        f"{'player':<30} {'games':>6} {'win%':>6} {'draw%':>6} "
+        f"{'errors':>6} {'turns':>6} {'cpu/game':>9} {'startup':>8}",
+        file=file,
+    )
+    for name, s in stats.items():
+        games = s["games"] or 1
+        print(
+            f"{name:<30} {s['games']:>6} {100 * s['wins'] / games:>6.1f} "
+            f"{100 * s['draws'] / games:>6.1f} {s['errors']:>6} "
+            f"{s['turns'] / games:>6.1f} {s['cpu'] / games:>8.3f}s "
+            f"{s['startup'] / games:>7.3f}s",
+            file=file,
+        )
+
+
+def main(argv=None):
+    options = get_options(argv)
+    board_cls = BitBoard if options.bitboard else Board
+    player_locs = (options.player1_loc, options.player2_loc)
+    servers = {}
+    out = open(options.output, "w") if options.output else sys.stdout
+    writer = RecordWriter(options.record) if options.record else None
+    records = []
+    try:
+        if options.isolate and options.prefork:
+            for loc in set(player_locs):
+                servers[loc] = PlayerServer(loc)
+                print(
+                    f"imported {package_spec(loc)} in "
+                    f"{servers[loc].import_time:.3f}s (once, in its fork "
+                    "server)",
+                    file=sys.stderr,
+                )
+        profile = None
+        if options.profile is not None:
+            profile = (options.profile, options.profile_mode)
+        tasks = [
+            (task, player_locs, options.time, options.space, board_cls,
+                options.isolate, servers, profile, writer is not None)
+            for task in schedule_games(options)
+        ]
+        with multiprocessing.Pool(
+            processes=max(1, options.jobs),
+            initializer=_init_worker,
+            initargs=(options.space,),
+        ) as pool:
+            for record, data in pool.imap_unordered(_run, tasks):
+                if data is not None:
+                    writer.write(data)
+                records.append(record)
+                print(json.dumps(record), file=out, flush=True)
+    finally:
+        for server in servers.values():
+            server.close()
+        if writer is not None:
+            writer.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print_summary(summarise(records, player_locs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Zobrist keys for hashing Cachex board states: one 64-bit key per (cell,
+token type) plus a key XORed in once the STEAL action has been played. A
+board's hash is the XOR of the keys of its tokens, so it can be kept up to
+date in O(changed cells) as tokens are placed, captured or swapped.
+
+Keys come from a fixed seed over a 15 x 15 grid (the largest allowed board),
+in the same order as alcos_inc/zobrist.py, so the referee and that agent
+compute identical hashes for identical positions.
+"""
+
+from random import Random
+
+# Largest supported board size
+_MAX_N = 15
+
+_rng = Random(30024)
+
+# Keys indexed by internal token type (1 = red, 2 = blue), then by
+# r * _MAX_N + q
+CELL_KEYS = {}
+CELL_KEYS[1] = [_rng.getrandbits(64) for _ in range(_MAX_N * _MAX_N)]
+CELL_KEYS[2] = [_rng.getrandbits(64) for _ in range(_MAX_N * _MAX_N)]
+
+# XORed in once blue has played STEAL
+STEAL_KEY = _rng.getrandbits(64)
+
+
+def cell_key(coord, token_type):
+    """
+    Key for a token of internal type token_type (1 or 2) at coord (r, q).
+    """
+    r, q = coord
+    return CELL_KEYS[token_type][int(r) * _MAX_N + int(q)]